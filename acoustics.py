@@ -1,7 +1,9 @@
 """
 This is a Python module for analysis of acoustic fields and waves
 in solids, using sympy and numpy for symbolic and numeric calculation,
-respectively.
+respectively. sympy is imported on first use of the symbolic classes, so
+numeric consumers of the material data and eval_kt2 (and of
+acoustics_numeric.py) only pay for numpy.
 
 References:
 [1] B.A. Auld, Acoustic fields and waves in solids, Vol. I,
@@ -10,7 +12,43 @@ John Wiley & Sons, New York, 1973.
 Created by Hao JIN on 2019/05/22
 """
 
-from sympy import Matrix, cos, sin, Rational, pprint
+from functools import lru_cache
+
+import numpy as np
+
+
+def _sparse_mul(*matrices):
+    """
+    return the product of sympy matrices, skipping the structural zeros
+    of the factors (most entries of unrotated constants and of liK)
+    """
+    from sympy import Add, Matrix
+    A = matrices[0].tolist()
+    for B in matrices[1:]:
+        rows = [[(k, x) for k, x in enumerate(row) if x != 0] for row in A]
+        cols = [{k: x for k, x in enumerate(col) if x != 0}
+                for col in B.T.tolist()]
+        A = [[Add(*[x*col[k] for k, x in row if k in col]) for col in cols]
+             for row in rows]
+    return Matrix(A)
+
+
+def _sparse_congruence(A, S):
+    """
+    return A*S*A.T of a symmetric S, only the upper triangle is multiplied
+    out and mirrored, skipping the structural zeros
+    """
+    from sympy import Add, Matrix
+    AS = _sparse_mul(A, S).tolist()
+    rows = [[(k, x) for k, x in enumerate(row) if x != 0] for row in AS]
+    A = [{k: x for k, x in enumerate(row) if x != 0} for row in A.tolist()]
+    n = len(A)
+    out = [[None]*n for _ in range(n)]
+    for i in range(n):
+        for j in range(i, n):
+            out[i][j] = out[j][i] = Add(*[x*A[j][k] for k, x in rows[i]
+                                          if k in A[j]])
+    return Matrix(out)
 
 
 class ElasticMaterial:
@@ -38,6 +76,7 @@ class ElasticMaterial:
 
     def get_description(self):
         """Return the description of material"""
+        from sympy import pprint
         print("This is a material with density, stiffness, and epsilon as:")
         pprint(self.density)
         pprint(self.stiffness)
@@ -48,6 +87,7 @@ class ElasticMaterial:
         rotate of theta about the x-axis
         return the rotational matrix R
         """
+        from sympy import Matrix, cos, sin
         # refer to pages 19-23 of Auld's book
         return Matrix([
             [1, 0, 0],
@@ -60,6 +100,7 @@ class ElasticMaterial:
         rotate of theta about the y-axis
         return the rotational matrix R
         """
+        from sympy import Matrix, cos, sin
         return Matrix([
             [cos(theta), 0, -sin(theta)],
             [0, 1, 0],
@@ -71,6 +112,7 @@ class ElasticMaterial:
         rotate of theta about the z-axis
         return the rotational matrix R
         """
+        from sympy import Matrix, cos, sin
         return Matrix([
             [cos(theta), sin(theta), 0],
             [-sin(theta), cos(theta), 0],
@@ -82,6 +124,7 @@ class ElasticMaterial:
         return the transformation matrix M
         according to the rotational matrix R
         """
+        from sympy import Matrix
         # refer to page 74 of Auld's book
         R00 = R[0, 0]
         R01 = R[0, 1]
@@ -112,6 +155,14 @@ class ElasticMaterial:
         return the rotational matrix R and transformation matrix M
         (R, M)
         """
+        # float angles go through the compiled closed form, symbolic or
+        # exact ones are multiplied out to keep sympy's automatic evaluation
+        if all(isinstance(x, (float, np.floating))
+               for x in (alpha, beta, gamma)):
+            from sympy import Matrix
+            R, M = euler_RM(alpha, beta, gamma)
+            return (Matrix(3, 3, R.ravel().tolist()),
+                    Matrix(6, 6, M.ravel().tolist()))
         R = self.rotz_R(gamma)*self.rotx_R(beta)*self.rotz_R(alpha)
         M = self.rot_M(R)
         return (R, M)
@@ -121,8 +172,10 @@ class ElasticMaterial:
         update matrices of stiffness and epsilon by the rotational matrix R and
         transformation matrix M, refer to p76 and p117 of Auld's book
         """
-        self.stiffness = M*self.stiffness*M.T
-        self.epsilon = R*self.epsilon*R.T
+        # only the 21 and 6 independent entries of the symmetric results are
+        # multiplied out
+        self.stiffness = _sparse_congruence(M, self.stiffness)
+        self.epsilon = _sparse_congruence(R, self.epsilon)
 
     def rot_euler_update(self, alpha, beta, gamma):
         """
@@ -145,7 +198,7 @@ class ElasticMaterial:
         lLj = transpose of liK
         """
         # refer to pages 164-165, Auld's book
-        return liK*self.stiffness*lLj
+        return _sparse_mul(liK, self.stiffness, lLj)
 
 
 class PiezoMaterial(ElasticMaterial):
@@ -158,6 +211,7 @@ class PiezoMaterial(ElasticMaterial):
 
     def get_description(self):
         """Return the description of material"""
+        from sympy import pprint
         super().get_description()
         print("And with piezoelectric stress constants as:")
         pprint(self.piezoelec)
@@ -169,7 +223,7 @@ class PiezoMaterial(ElasticMaterial):
         refer to p76, p117, and p275 of Auld's book
         """
         super().rot_update(R, M)
-        self.piezoelec = R*self.piezoelec*M.T
+        self.piezoelec = _sparse_mul(R, self.piezoelec, M.T)
     
     def rot_euler_update(self, alpha, beta, gamma):
         """
@@ -204,7 +258,7 @@ class PiezoMaterial(ElasticMaterial):
         lLj = transpose of liK
         """
         # refer to pages 164-165, 300, Auld's book
-        return liK*self.cal_cD(li, lj)*lLj
+        return _sparse_mul(liK, self.cal_cD(li, lj), lLj)
 
 
 class Isotropic():
@@ -216,6 +270,8 @@ class Isotropic():
     # another names: c44 ~ nu; c12 ~ lambda
     # relation: c12 = c11 - 2*c44
     def __init__(self, c11, c44, eSxx):
+        from sympy import Matrix
+        self.constants = (c11, c44, eSxx)
         self.c = Matrix([
             [c11, c11 - 2*c44, c11 - 2*c44, 0, 0, 0],
             [c11 - 2*c44, c11, c11 - 2*c44, 0, 0, 0],
@@ -239,6 +295,8 @@ class Cubic():
 
     # refer to pages 362, 374, 379, Auld's book
     def __init__(self, c11, c12, c44, ex4, eSxx):
+        from sympy import Matrix
+        self.constants = (c11, c12, c44, ex4, eSxx)
         self.c = Matrix([
             [c11, c12, c12, 0, 0, 0],
             [c12, c11, c12, 0, 0, 0],
@@ -269,6 +327,9 @@ class Trig3m():
     # refer to pages 362, 373, 379, Auld's book
     def __init__(self, c11, c12, c13, c14, c33, c44,
                  ex5, ey2, ez1, ez3, eSxx, eSzz):
+        from sympy import Matrix, Rational
+        self.constants = (
+            c11, c12, c13, c14, c33, c44, ex5, ey2, ez1, ez3, eSxx, eSzz)
         self.c = Matrix([
             [c11, c12, c13, c14, 0, 0],
             [c12, c11, c13, -c14, 0, 0],
@@ -298,6 +359,8 @@ class Trig32():
     # refer to pages 362, 373, 379, Auld's book
     def __init__(self, c11, c12, c13, c14, c33, c44,
                  ex1, ex4, eSxx, eSzz):
+        from sympy import Matrix, Rational
+        self.constants = (c11, c12, c13, c14, c33, c44, ex1, ex4, eSxx, eSzz)
         self.c = Matrix([
             [c11, c12, c13, c14, 0, 0],
             [c12, c11, c13, -c14, 0, 0],
@@ -326,6 +389,8 @@ class Hex6mm():
 
     # refer to pages 362, 373, 379, Auld's book
     def __init__(self, c11, c12, c13, c33, c44, ex5, ez1, ez3, eSxx, eSzz):
+        from sympy import Matrix, Rational
+        self.constants = (c11, c12, c13, c33, c44, ex5, ez1, ez3, eSxx, eSzz)
         self.c = Matrix([
             [c11, c12, c13, 0, 0, 0],
             [c12, c11, c13, 0, 0, 0],
@@ -346,6 +411,52 @@ class Hex6mm():
         ])
 
 
+@lru_cache(maxsize=None)
+def _euler_kernel():
+    """
+    derive the closed-form R and M of Z(alpha)-X(beta)-Z(gamma) euler
+    angles once, and compile them after common-subexpression elimination
+    into a numpy function of (alpha, beta, gamma) returning the 9 + 36
+    entries
+    """
+    from sympy import symbols, cse
+    from sympy.printing.lambdarepr import NumPyPrinter
+
+    angles = symbols("alpha beta gamma")
+    material = ElasticMaterial(None, None, None)
+    R = material.rotz_R(angles[2])*material.rotx_R(angles[1]) * \
+        material.rotz_R(angles[0])
+    M = material.rot_M(R)
+
+    replacements, entries = cse(list(R) + list(M))
+    printer = NumPyPrinter()
+    lines = ["def kernel(%s):" % ", ".join(map(str, angles))]
+    lines += ["    %s = %s" % (x, printer.doprint(expr))
+              for x, expr in replacements]
+    lines.append("    return [%s]" % ", ".join(map(printer.doprint, entries)))
+    namespace = {"numpy": np}
+    exec("\n".join(lines), namespace)
+    return namespace["kernel"]
+
+
+def euler_RM(alpha, beta, gamma):
+    """
+    evaluate R and M of Z(alpha)-X(beta)-Z(gamma) euler angles, in rad,
+    numerically with the compiled closed form,
+    return (R, M) as numpy arrays, (..., 3, 3) and (..., 6, 6) for
+    arrays of angles
+    """
+    entries = _euler_kernel()(alpha, beta, gamma)
+    if np.ndim(alpha) == np.ndim(beta) == np.ndim(gamma) == 0:
+        RM = np.array(entries, dtype=float)
+    else:
+        RM = np.stack(np.broadcast_arrays(
+            *[np.asarray(x, dtype=float) for x in entries]), axis=-1)
+    shape = RM.shape[:-1]
+    return (RM[..., :9].reshape(shape + (3, 3)),
+            RM[..., 9:].reshape(shape + (6, 6)))
+
+
 # Define function for evaluation of kt2
 def eval_kt2(va, va0):
     """
@@ -0,0 +1,884 @@
+"""
+This is a numeric counterpart of 'acoustics.py'. The classes hold the
+material constants as numpy float64 arrays instead of sympy matrices, so
+rotations and Christoffel matrices are evaluated in microseconds. Use the
+symbolic classes in 'acoustics.py' for derivations and these ones when all
+inputs are plain numbers.
+
+Besides the interface of 'acoustics.py', the materials rotate N
+orientations at once (rot_euler_batch), solve the Christoffel equation for
+N directions (cal_velocity) and give the group velocities, power-flow
+angles and anisotropy parameters of the bulk modes from analytic
+derivatives of the eigenvalues (cal_group_velocity, cal_power_flow_plane).
+The Christoffel matrices are quadratic forms whose coefficients are
+contracted once from the constants. The crystal classes carry their
+independent constants (names, constants) and zero/tie pattern (basis,
+sparsity), and pack/unpack keep only the 21 + 6 + 18 independent
+components of rotated constants. voigt_to_tensor, piezo_to_tensor and
+their inverses convert losslessly to the full cijkl/eijk tensors, which
+rot_tensors rotates with rotate_tensor instead of the Bond matrix, faster
+for single rotations and slower for batches (python benchmark.py -k
+rotate).
+
+References:
+[1] B.A. Auld, Acoustic fields and waves in solids, Vol. I,
+John Wiley & Sons, New York, 1973.
+======================================================================
+"""
+
+import numpy as np
+
+
+def _matrix(rows):
+    """
+    assemble a matrix from nested rows of scalars or equally shaped arrays,
+    entries of shape (...) give a stacked matrix of shape (..., m, n)
+    """
+    entries = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for row in rows for x in row])
+    shape = entries[0].shape + (len(rows), len(rows[0]))
+    return np.stack(entries, axis=-1).reshape(shape)
+
+
+def _liK(l):
+    """
+    return the matrix liK of pages 164-165 of Auld's book for directions
+    l in (..., 3), stacked as (..., 3, 6)
+    """
+    lx, ly, lz = l[..., 0], l[..., 1], l[..., 2]
+    return _matrix([
+        [lx, 0, 0, 0, lz, ly],
+        [0, ly, 0, lz, 0, lx],
+        [0, 0, lz, ly, lx, 0]
+    ])
+
+
+# the index pairs of the Voigt indices 1..6, the i-th pair also gives the
+# i-th monomial l_p*l_q of the quadratic forms of a direction
+_VOIGT = ((0, 0), (1, 1), (2, 2), (1, 2), (0, 2), (0, 1))
+_VOIGT_INDEX = np.array([[0, 5, 4], [5, 1, 3], [4, 3, 2]])
+# sums the 9 products l_p*l_q into the 6 monomials
+_MONOMIAL_SUM = np.eye(6)[_VOIGT_INDEX.ravel()]
+_UPPER6 = np.triu_indices(6)
+_UPPER3 = np.triu_indices(3)
+
+
+def _monomials(l):
+    """return the monomials l_p*l_q of directions l (..., 3) as (..., 6)"""
+    p, q = np.array(_VOIGT).T
+    return l[..., p]*l[..., q]
+
+
+def _quadratic(form, l):
+    """
+    evaluate quadratic forms of l given by their monomial coefficients,
+    form in (..., k, 6) and l in (..., 3) give (..., k)
+    """
+    return (_monomials(l)[..., None, :] @ np.swapaxes(form, -1, -2))[..., 0, :]
+
+
+def pack(stiffness, epsilon, piezoelec=None):
+    """
+    return the independent components of (stacked) constants, the 21 upper
+    entries of the stiffness, the 6 of epsilon and the 18 of piezoelec, as
+    (..., 27) or (..., 45)
+    """
+    parts = [np.asarray(stiffness)[..., _UPPER6[0], _UPPER6[1]],
+             np.asarray(epsilon)[..., _UPPER3[0], _UPPER3[1]]]
+    if piezoelec is not None:
+        piezoelec = np.asarray(piezoelec)
+        parts.append(piezoelec.reshape(piezoelec.shape[:-2] + (18,)))
+    return np.concatenate(parts, axis=-1)
+
+
+def _symmetric(upper, n):
+    """return the symmetric (..., n, n) matrices of their upper entries"""
+    i, j = np.triu_indices(n)
+    out = np.empty(upper.shape[:-1] + (n, n))
+    out[..., i, j] = upper
+    out[..., j, i] = upper
+    return out
+
+
+def unpack(constants):
+    """
+    return (stiffness, epsilon) or (stiffness, epsilon, piezoelec) of the
+    independent components (..., 27) or (..., 45), see pack
+    """
+    constants = np.asarray(constants, dtype=float)
+    if constants.shape[-1] not in (27, 45):
+        raise ValueError("expected 27 or 45 independent components, got "
+                         f"{constants.shape[-1]}")
+    out = (_symmetric(constants[..., :21], 6),
+           _symmetric(constants[..., 21:27], 3))
+    if constants.shape[-1] == 45:
+        out += (constants[..., 27:].reshape(constants.shape[:-1] + (3, 6)),)
+    return out
+
+
+def voigt_to_tensor(c):
+    """
+    return the fourth-rank tensor (..., 3, 3, 3, 3) of Voigt constants
+    c (..., 6, 6), c_ijkl = c[voigt(i, j), voigt(k, l)]
+    """
+    c = np.asarray(c, dtype=float)
+    return c[..., _VOIGT_INDEX[:, :, None, None], _VOIGT_INDEX[None, None]]
+
+
+def tensor_to_voigt(cijkl):
+    """
+    return the Voigt constants (..., 6, 6) of a fourth-rank tensor with the
+    minor symmetries, the inverse of voigt_to_tensor
+    """
+    p, q = np.array(_VOIGT).T
+    cijkl = np.asarray(cijkl, dtype=float)
+    return cijkl[..., p[:, None], q[:, None], p[None, :], q[None, :]]
+
+
+def piezo_to_tensor(e):
+    """
+    return the third-rank tensor (..., 3, 3, 3) of piezoelectric constants
+    e (..., 3, 6), e_ijk = e[i, voigt(j, k)]
+    """
+    e = np.asarray(e, dtype=float)
+    return e[..., np.arange(3)[:, None, None], _VOIGT_INDEX[None]]
+
+
+def tensor_to_piezo(eijk):
+    """
+    return the piezoelectric constants (..., 3, 6) of a third-rank tensor
+    symmetric in its last two indices, the inverse of piezo_to_tensor
+    """
+    p, q = np.array(_VOIGT).T
+    eijk = np.asarray(eijk, dtype=float)
+    return eijk[..., np.arange(3)[:, None], p[None, :], q[None, :]]
+
+
+def _kron_R(R, n):
+    """return the n-fold Kronecker product of R (..., 3, 3), (..., 3^n, 3^n)"""
+    if n == 1:
+        return R
+    indices = "abcd"[:n]
+    K = np.einsum(",".join(f"...{i}{i.upper()}" for i in indices) + "->..."
+                  + indices + indices.upper(), *[R]*n)
+    return K.reshape(R.shape[:-2] + (3**n, 3**n))
+
+
+def rotate_tensor(R, T, rank, kron=None):
+    """
+    rotate (stacked) tensors T (..., 3, ..., 3) of a rank by the rotational
+    matrices R (..., 3, 3), T'_ij.. = R_ip R_jq .. T_pq.., refer to p76 of
+    Auld's book, return T' broadcast over the leading axes,
+    kron, optional dict {n: n-fold Kronecker product of R} shared between
+    calls with the same R
+    """
+    # the einsum over all indices is factored as (R x R) T (R x R)^T, the
+    # Kronecker products are batched matmuls of at most 9 x 9
+    R = np.asarray(R, dtype=float)
+    T = np.asarray(T, dtype=float)
+    kron = {} if kron is None else kron
+    for n in {(rank + 1)//2, rank//2} - set(kron) - {0}:
+        kron[n] = _kron_R(R, n)
+    left, right = (rank + 1)//2, rank//2
+    batch = T.shape[:T.ndim - rank]
+    out = kron[left] @ T.reshape(batch + (3**left, 3**right))
+    if right:
+        out = out @ np.swapaxes(kron[right], -1, -2)
+    return out.reshape(out.shape[:-2] + (3,)*rank)
+
+
+def euler_RM(alpha, beta, gamma):
+    """
+    evaluate R and M of Z(alpha)-X(beta)-Z(gamma) euler angles, in rad, in
+    one pass over their closed form, the numpy-only counterpart of the
+    compiled acoustics.euler_RM,
+    return (R, M), (..., 3, 3) and (..., 6, 6) for arrays of angles
+    """
+    ca, sa = np.cos(alpha), np.sin(alpha)
+    cb, sb = np.cos(beta), np.sin(beta)
+    cg, sg = np.cos(gamma), np.sin(gamma)
+    # R = Rz(gamma)*Rx(beta)*Rz(alpha)
+    cbsa, cbca = cb*sa, cb*ca
+    R00, R01, R02 = cg*ca - sg*cbsa, cg*sa + sg*cbca, sg*sb
+    R10, R11, R12 = -sg*ca - cg*cbsa, -sg*sa + cg*cbca, cg*sb
+    R20, R21, R22 = sb*sa, -sb*ca, cb
+    # M of rot_M, refer to page 74 of Auld's book
+    entries = [
+        R00, R01, R02, R10, R11, R12, R20, R21, R22,
+        R00*R00, R01*R01, R02*R02, 2*R01*R02, 2*R02*R00, 2*R00*R01,
+        R10*R10, R11*R11, R12*R12, 2*R11*R12, 2*R12*R10, 2*R10*R11,
+        R20*R20, R21*R21, R22*R22, 2*R21*R22, 2*R22*R20, 2*R20*R21,
+        R10*R20, R11*R21, R12*R22, R11*R22 + R12*R21, R10*R22 + R12*R20,
+        R10*R21 + R11*R20,
+        R20*R00, R21*R01, R22*R02, R01*R22 + R02*R21, R00*R22 + R02*R20,
+        R00*R21 + R01*R20,
+        R00*R10, R01*R11, R02*R12, R01*R12 + R02*R11, R00*R12 + R02*R10,
+        R00*R11 + R01*R10,
+    ]
+    if np.ndim(alpha) == np.ndim(beta) == np.ndim(gamma) == 0:
+        RM = np.array(entries, dtype=float)
+    else:
+        RM = np.stack(np.broadcast_arrays(*entries), axis=-1)
+    shape = RM.shape[:-1]
+    return (RM[..., :9].reshape(shape + (3, 3)),
+            RM[..., 9:].reshape(shape + (6, 6)))
+
+
+class ElasticMaterial:
+    """
+    Elastic materials used in acoustic waves and fields, numeric version.
+
+    The methods mirror acoustics.ElasticMaterial (same rotation convention,
+    same argument order), but take and return numpy arrays.
+    The density is in kg/m^3 (the material dicts of 'acoustics.py' are in
+    g/m^3). The *_batch methods also accept stacked constants, e.g. the
+    (N, 6, 6) stiffness returned by rot_euler_batch.
+    """
+
+    def __init__(self, density, stiffness, epsilon):
+        """Initialize attributes to describe a elastic materials"""
+        self.density = density
+        self.stiffness = np.array(stiffness, dtype=float)
+        self.epsilon = np.array(epsilon, dtype=float)
+
+    def get_description(self):
+        """Return the description of material"""
+        print("This is a material with density, stiffness, and epsilon as:")
+        print(self.density)
+        print(self.stiffness)
+        print(self.epsilon)
+
+    def rotx_R(self, theta):
+        """
+        rotate of theta about the x-axis
+        return the rotational matrix R, (..., 3, 3) for an array of theta
+        """
+        # refer to pages 19-23 of Auld's book
+        c, s = np.cos(theta), np.sin(theta)
+        return _matrix([
+            [1, 0, 0],
+            [0, c, s],
+            [0, -s, c]
+        ])
+
+    def roty_R(self, theta):
+        """
+        rotate of theta about the y-axis
+        return the rotational matrix R, (..., 3, 3) for an array of theta
+        """
+        c, s = np.cos(theta), np.sin(theta)
+        return _matrix([
+            [c, 0, -s],
+            [0, 1, 0],
+            [s, 0, c]
+        ])
+
+    def rotz_R(self, theta):
+        """
+        rotate of theta about the z-axis
+        return the rotational matrix R, (..., 3, 3) for an array of theta
+        """
+        c, s = np.cos(theta), np.sin(theta)
+        return _matrix([
+            [c, s, 0],
+            [-s, c, 0],
+            [0, 0, 1]
+        ])
+
+    def rot_M(self, R):
+        """
+        return the transformation matrix M
+        according to the rotational matrix R,
+        R in (..., 3, 3) gives M in (..., 6, 6)
+        """
+        # refer to page 74 of Auld's book
+        R = np.asarray(R, dtype=float)
+        R00, R01, R02 = R[..., 0, 0], R[..., 0, 1], R[..., 0, 2]
+        R10, R11, R12 = R[..., 1, 0], R[..., 1, 1], R[..., 1, 2]
+        R20, R21, R22 = R[..., 2, 0], R[..., 2, 1], R[..., 2, 2]
+
+        M = _matrix([
+            [R00**2, R01**2, R02**2, 2*R01*R02, 2*R02*R00, 2*R00*R01],
+            [R10**2, R11**2, R12**2, 2*R11*R12, 2*R12*R10, 2*R10*R11],
+            [R20**2, R21**2, R22**2, 2*R21*R22, 2*R22*R20, 2*R20*R21],
+            [R10*R20, R11*R21, R12*R22, R11*R22 + R12*R21, R10*R22 + R12*R20,
+             R10*R21 + R11*R20],
+            [R20*R00, R21*R01, R22*R02, R01*R22 + R02*R21, R00*R22 + R02*R20,
+             R00*R21 + R01*R20],
+            [R00*R10, R01*R11, R02*R12, R01*R12 + R02*R11, R00*R12 + R02*R10,
+             R00*R11 + R01*R10]
+        ])
+        return M
+
+    def rot_euler_RM(self, alpha, beta, gamma):
+        """
+        rotate by Z(alpha)-X(beta)-Z(gamma) euler angles, in rad,
+        return the rotational matrix R and transformation matrix M
+        (R, M), stacked along the leading axes for arrays of angles
+        """
+        return euler_RM(alpha, beta, gamma)
+
+    def rot_update(self, R, M):
+        """
+        update matrices of stiffness and epsilon by the rotational matrix R and
+        transformation matrix M, refer to p76 and p117 of Auld's book,
+        stacked R (N, 3, 3) and M (N, 6, 6) give stacked matrices
+        """
+        self.stiffness = M @ self.stiffness @ np.swapaxes(M, -1, -2)
+        self.epsilon = R @ self.epsilon @ np.swapaxes(R, -1, -2)
+
+    def rot_euler_update(self, alpha, beta, gamma):
+        """
+        rotate by Z(alpha)-X(beta)-Z(gamma) euler angles,
+        update matrices of stiffness and epsilon
+        """
+        R, M = self.rot_euler_RM(alpha, beta, gamma)
+        self.rot_update(R, M)
+
+    def rot_euler_batch(self, angles, packed=False):
+        """
+        rotate by N sets of Z(alpha)-X(beta)-Z(gamma) euler angles at once,
+        angles, (N, 3) array of (alpha, beta, gamma) in rad
+        return (R, M, stiffness, epsilon) stacked as (N, 3, 3), (N, 6, 6),
+        (N, 6, 6) and (N, 3, 3), the material itself is not updated,
+        packed, return (R, M, constants) instead, with only the 21 + 6
+        independent components (N, 27) of the rotated constants, see pack
+        """
+        angles = np.asarray(angles, dtype=float).reshape(-1, 3)
+        R, M = self.rot_euler_RM(angles[:, 0], angles[:, 1], angles[:, 2])
+        stiffness = np.einsum('nij,jk,nlk->nil', M, self.stiffness, M,
+                              optimize=True)
+        epsilon = np.einsum('nij,jk,nlk->nil', R, self.epsilon, R,
+                            optimize=True)
+        if packed:
+            return (R, M, pack(stiffness, epsilon))
+        return (R, M, stiffness, epsilon)
+
+    def tensors(self):
+        """
+        return the constants as full tensors (cijkl, epsilon), (3, 3, 3, 3)
+        and (3, 3), see voigt_to_tensor
+        """
+        return (voigt_to_tensor(self.stiffness), self.epsilon)
+
+    @classmethod
+    def from_tensors(cls, density, cijkl, epsilon):
+        """build a material from full tensors, see tensors"""
+        return cls(density, tensor_to_voigt(cijkl), epsilon)
+
+    def rot_tensors(self, R):
+        """
+        rotate the full tensors of the constants by the rotational matrices
+        R (..., 3, 3) without the Bond matrix, return them as tensors()
+        stacked along the leading axes of R, the material itself is not
+        updated
+        """
+        kron = {}
+        return tuple(rotate_tensor(R, T, np.ndim(T), kron)
+                     for T in self.tensors())
+
+    def cal_Gamma(self, li, lj, liK, lLj):
+        """
+        calculate the Christoffel matrix,
+        li, the direction of wave propagation, [[lx, ly, lz]]
+        lj, transpose of li
+        liK = np.array([
+            [lx, 0, 0, 0, lz, ly],
+            [0, ly, 0, lz, 0, lx],
+            [0, 0, lz, ly, lx, 0]
+        ])
+        lLj = transpose of liK
+        """
+        # refer to pages 164-165, Auld's book
+        return liK @ self.stiffness @ lLj
+
+    def _christoffel_form(self):
+        """
+        return the coefficients (..., 9, 6) of the Christoffel matrix as a
+        quadratic form of the direction, Gamma[a, b] = sum over the 6
+        monomials l_p*l_q, contracted once from the stiffness
+        """
+        # Gamma_ab = c_arbs l_r l_s, c_arbs = c[voigt(a, r), voigt(b, s)]
+        c = self.stiffness
+        cijkl = c[..., _VOIGT_INDEX[:, None, :, None],
+                  _VOIGT_INDEX[None, :, None, :]]
+        return cijkl.reshape(c.shape[:-2] + (9, 9)) @ _MONOMIAL_SUM
+
+    def cal_Gamma_batch(self, l):
+        """
+        calculate the Christoffel matrices for N directions at once,
+        l, (N, 3) array of unit directions of wave propagation
+        return Gamma in (N, 3, 3)
+        """
+        # a 9x6 product per direction instead of liK*c*lLj, the structural
+        # zeros of the constants drop out of the contracted form
+        Gamma = _quadratic(self._christoffel_form(),
+                           np.asarray(l, dtype=float))
+        return Gamma.reshape(Gamma.shape[:-1] + (3, 3))
+
+    def cal_velocity(self, l):
+        """
+        solve the Christoffel equation for N directions at once,
+        l, (N, 3) array of unit directions of wave propagation
+        return (v, u), phase velocities in (N, 3), m/s, sorted from slow to
+        fast, and the polarizations in (N, 3, 3) with u[n, :, k] belonging
+        to v[n, k]
+        """
+        # refer to pages 165-166, Auld's book
+        w, u = np.linalg.eigh(self.cal_Gamma_batch(l))
+        return (np.sqrt(w/self.density), u)
+
+    def cal_Gamma_derivatives(self, l, t):
+        """
+        calculate the Christoffel matrices and their first and second
+        derivatives along the circle l*cos(theta) + t*sin(theta) at theta = 0,
+        l, t, (N, 3) arrays of orthogonal unit directions, the first
+        derivative is the derivative along t for any t
+        return (Gamma, dGamma, d2Gamma) in (N, 3, 3)
+        """
+        lK = _liK(np.asarray(l, dtype=float))
+        tK = _liK(np.asarray(t, dtype=float))
+        Gll = lK @ self.stiffness @ np.swapaxes(lK, -1, -2)
+        Glt = lK @ self.stiffness @ np.swapaxes(tK, -1, -2)
+        Gtt = tK @ self.stiffness @ np.swapaxes(tK, -1, -2)
+        return (Gll, Glt + np.swapaxes(Glt, -1, -2), 2*(Gtt - Gll))
+
+    def _velocity_derivatives(self, w, u, dGamma, d2Gamma=None, tol=1e-6):
+        """
+        return the phase velocities and their derivatives (v, dv, d2v) from
+        the eigenvalues w and eigenvectors u of Gamma, by first and second
+        order perturbation of the eigenvalues, d2v is None without d2Gamma.
+        Eigenvalues closer than tol relative to the largest are degenerate
+        (an acoustic axis): dGamma is diagonalized within their subspace
+        first, so the derivatives are those of the branches leaving the
+        axis toward positive theta, ordered by dv within the degenerate set,
+        and the pairs of the set are left out of the second-order coupling
+        """
+        n = w.shape[-1]
+        # label the sets of degenerate (sorted, so contiguous) eigenvalues
+        close = np.diff(w, axis=-1) <= tol*np.abs(w).max(axis=-1,
+                                                          keepdims=True)
+        group = np.concatenate([np.zeros(w.shape[:-1] + (1,), dtype=int),
+                                np.cumsum(~close, axis=-1)], axis=-1)
+        same = group[..., :, None] == group[..., None, :]
+        A = np.swapaxes(u, -1, -2) @ dGamma @ u
+        # diagonalize A within the degenerate sets, the sets kept apart by
+        # offsets beyond the spread of A
+        offset = 2*np.abs(A).sum(axis=(-2, -1))[..., None] + 1.0
+        _, V = np.linalg.eigh(np.where(same, A, 0.0) +
+                              np.eye(n)*(group*offset)[..., None, :])
+        u = u @ V
+        A = np.swapaxes(V, -1, -2) @ A @ V
+        dw = np.diagonal(A, axis1=-2, axis2=-1)
+        v = np.sqrt(w/self.density)
+        dv = dw/(2*self.density*v)
+        if d2Gamma is None:
+            return (v, dv, None)
+        gap = w[..., :, None] - w[..., None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coupling = np.where(same, 0.0, np.swapaxes(A, -1, -2)**2/gap)
+        d2w = np.einsum('...in,...ij,...jn->...n', u, d2Gamma, u) + \
+            2*coupling.sum(axis=-1)
+        d2v = d2w/(2*self.density*v) - dw**2/(4*self.density**2*v**3)
+        return (v, dv, d2v)
+
+    def cal_power_flow(self, l, t):
+        """
+        calculate the beam steering of the three bulk modes propagating along
+        l, turning the direction toward t,
+        l, t, (N, 3) arrays of orthogonal unit directions
+        return (v, vg, psi, gamma) in (N, 3), sorted from slow to fast,
+        phase velocity and the group velocity in the l-t plane, m/s, the
+        power-flow angle psi = arctan(dv/dtheta/v), rad, positive toward t,
+        and the anisotropy (diffraction) parameter gamma = dpsi/dtheta,
+        at an acoustic axis (degenerate modes) those of the branches leaving
+        it toward t, ordered by psi, see _velocity_derivatives
+        """
+        # energy velocity, refer to chapter 7 of Auld's book
+        Gamma, dGamma, d2Gamma = self.cal_Gamma_derivatives(l, t)
+        w, u = np.linalg.eigh(Gamma)
+        v, dv, d2v = self._velocity_derivatives(w, u, dGamma, d2Gamma)
+        return (v, np.hypot(v, dv), np.arctan2(dv, v),
+                (v*d2v - dv**2)/(v**2 + dv**2))
+
+    def cal_power_flow_plane(self, theta):
+        """
+        calculate the beam steering over directions at angles theta (rad)
+        from x1 in the x1-x2 plane, the surface of a cut rotated by
+        rot_euler_update, see cal_power_flow
+        """
+        theta = np.asarray(theta, dtype=float)
+        c, s, z = np.cos(theta), np.sin(theta), np.zeros_like(theta)
+        return self.cal_power_flow(np.stack([c, s, z], axis=-1),
+                                   np.stack([-s, c, z], axis=-1))
+
+    def cal_group_velocity(self, l):
+        """
+        calculate the group (energy) velocity vectors of the three bulk
+        modes for N directions at once,
+        l, (N, 3) array of unit directions of wave propagation
+        return vg in (N, 3, 3), vg[n, k, :] belonging to the k-th slowest
+        mode, along an acoustic axis (degenerate modes) the group velocity
+        is not defined, each component is then that of a branch leaving the
+        axis along its own coordinate axis
+        """
+        l = np.asarray(l, dtype=float)
+        w, u = np.linalg.eigh(self.cal_Gamma_batch(l))
+        vg = []
+        for axis in np.eye(3):
+            dGamma = self.cal_Gamma_derivatives(
+                l, np.broadcast_to(axis, l.shape))[1]
+            vg.append(self._velocity_derivatives(w, u, dGamma)[1])
+        return np.stack(vg, axis=-1)
+
+
+class PiezoMaterial(ElasticMaterial):
+    """Class for piezoelectric materials, numeric version."""
+
+    def __init__(self, density, stiffness, epsilon, piezoelec):
+        """Initialize attributes of the parent class."""
+        super().__init__(density, stiffness, epsilon)
+        self.piezoelec = np.array(piezoelec, dtype=float)
+
+    @classmethod
+    def from_crystal(cls, density, crystal):
+        """
+        build a numeric material from a crystal class (Isotropic, Cubic,
+        Trig3m, Trig32, Hex6mm) of this module, or of 'acoustics.py'
+        evaluated with numbers
+        """
+        return cls(density,
+                   np.array(crystal.c, dtype=float),
+                   np.array(crystal.eS, dtype=float),
+                   np.array(crystal.e, dtype=float))
+
+    def get_description(self):
+        """Return the description of material"""
+        super().get_description()
+        print("And with piezoelectric stress constants as:")
+        print(self.piezoelec)
+
+    def rot_update(self, R, M):
+        """
+        update matrices of stiffness, epsilon and piezoelectric stress
+        constants by the rotational matrix R and transformation matrix M,
+        refer to p76, p117, and p275 of Auld's book
+        """
+        super().rot_update(R, M)
+        self.piezoelec = R @ self.piezoelec @ np.swapaxes(M, -1, -2)
+
+    def rot_euler_batch(self, angles, packed=False):
+        """
+        rotate by N sets of Z(alpha)-X(beta)-Z(gamma) euler angles at once,
+        angles, (N, 3) array of (alpha, beta, gamma) in rad
+        return (R, M, stiffness, epsilon, piezoelec) stacked as (N, 3, 3),
+        (N, 6, 6), (N, 6, 6), (N, 3, 3) and (N, 3, 6), the material itself
+        is not updated,
+        packed, return (R, M, constants) instead, with only the 21 + 6 + 18
+        independent components (N, 45) of the rotated constants, see pack
+        """
+        R, M, *rotated = super().rot_euler_batch(angles, packed)
+        piezoelec = np.einsum('nij,jk,nlk->nil', R, self.piezoelec, M,
+                              optimize=True)
+        if packed:
+            return (R, M, np.concatenate(
+                [rotated[0], piezoelec.reshape(-1, 18)], axis=-1))
+        return (R, M, *rotated, piezoelec)
+
+    @classmethod
+    def from_packed(cls, density, constants):
+        """
+        build a numeric material from the 45 independent components of its
+        (possibly stacked) constants, see pack
+        """
+        stiffness, epsilon, piezoelec = unpack(constants)
+        return cls(density, stiffness, epsilon, piezoelec)
+
+    def tensors(self):
+        """
+        return the constants as full tensors (cijkl, epsilon, eijk),
+        (3, 3, 3, 3), (3, 3) and (3, 3, 3), see voigt_to_tensor and
+        piezo_to_tensor
+        """
+        return super().tensors() + (piezo_to_tensor(self.piezoelec),)
+
+    @classmethod
+    def from_tensors(cls, density, cijkl, epsilon, eijk):
+        """build a material from full tensors, see tensors"""
+        return cls(density, tensor_to_voigt(cijkl), epsilon,
+                   tensor_to_piezo(eijk))
+
+    def cal_cD(self, li, lj):
+        """
+        calculate cD, the stiffness constants at zero electric displacement,
+        li, the direction of wave propagation, [[lx, ly, lz]]
+        lj, transpose of li
+        """
+        # refer to page 300, Auld's book
+        cD = self.stiffness + \
+            (self.piezoelec.T @ lj) @ (li @ self.piezoelec) / \
+            (li @ self.epsilon @ lj)[0, 0]
+        return cD
+
+    def cal_Gamma(self, li, lj, liK, lLj):
+        """
+        calculate the Christoffel matrix,
+        li, the direction of wave propagation, [[lx, ly, lz]]
+        lj, transpose of li
+        liK = np.array([
+            [lx, 0, 0, 0, lz, ly],
+            [0, ly, 0, lz, 0, lx],
+            [0, 0, lz, ly, lx, 0]
+        ])
+        lLj = transpose of liK
+        """
+        # refer to pages 164-165, 300, Auld's book
+        return liK @ self.cal_cD(li, lj) @ lLj
+
+    def cal_cD_batch(self, l):
+        """
+        calculate cD for N directions at once,
+        l, (N, 3) array of unit directions of wave propagation
+        return cD in (N, 6, 6)
+        """
+        # refer to page 300, Auld's book
+        l = np.asarray(l, dtype=float)
+        le = np.einsum('...i,...ij->...j', l, self.piezoelec)
+        lel = _quadratic(self._piezo_forms()[1], l)[..., 0]
+        return self.stiffness + \
+            le[..., :, None]*le[..., None, :]/lel[..., None, None]
+
+    def _piezo_forms(self):
+        """
+        return the coefficients of g = liK*e^T*l (..., 3, 6) and of
+        d = l*epsilon*l (..., 1, 6) as quadratic forms of the direction, the
+        stiffening of the Christoffel matrix is g*g^T/d
+        """
+        e = self.piezoelec
+        # g_a = e[j, voigt(a, r)] l_r l_j
+        eijk = e[..., np.arange(3)[None, None, :], _VOIGT_INDEX[:, :, None]]
+        eps = self.epsilon
+        return (eijk.reshape(e.shape[:-2] + (3, 9)) @ _MONOMIAL_SUM,
+                eps.reshape(eps.shape[:-2] + (1, 9)) @ _MONOMIAL_SUM)
+
+    def cal_Gamma_batch(self, l):
+        """
+        calculate the piezoelectrically stiffened Christoffel matrices for N
+        directions at once,
+        l, (N, 3) array of unit directions of wave propagation
+        return Gamma in (N, 3, 3)
+        """
+        # refer to pages 164-165, 300, Auld's book
+        l = np.asarray(l, dtype=float)
+        g_form, d_form = self._piezo_forms()
+        g = _quadratic(g_form, l)
+        d = _quadratic(d_form, l)[..., 0]
+        return super().cal_Gamma_batch(l) + \
+            g[..., :, None]*g[..., None, :]/d[..., None, None]
+
+    def cal_Gamma_derivatives(self, l, t):
+        """
+        calculate the stiffened Christoffel matrices and their first and
+        second derivatives along the circle l*cos(theta) + t*sin(theta) at
+        theta = 0, see ElasticMaterial.cal_Gamma_derivatives
+        """
+        Gamma, dGamma, d2Gamma = super().cal_Gamma_derivatives(l, t)
+        l = np.asarray(l, dtype=float)
+        t = np.asarray(t, dtype=float)
+        lK = _liK(l)
+        tK = _liK(t)
+        eT = self.piezoelec.T
+
+        def g(p, pK, q):
+            return np.einsum('...ij,jk,...k->...i', pK, eT, q)
+
+        def d(p, q):
+            return np.einsum('...i,ij,...j->...', p, self.epsilon, q)
+
+        # Gamma = Gamma_c + g g^T/d, g and d quadratic forms of l
+        g0 = g(l, lK, l)
+        g1 = g(t, tK, l) + g(l, lK, t)
+        g2 = 2*(g(t, tK, t) - g0)
+        d0 = d(l, l)[..., None, None]
+        d1 = 2*d(t, l)[..., None, None]
+        d2 = 2*(d(t, t)[..., None, None] - d0)
+
+        def outer(a, b):
+            return a[..., :, None]*b[..., None, :]
+
+        gg = outer(g0, g0)
+        gg1 = outer(g1, g0) + outer(g0, g1)
+        return (Gamma + gg/d0,
+                dGamma + gg1/d0 - gg*d1/d0**2,
+                d2Gamma + (outer(g2, g0) + 2*outer(g1, g1) + outer(g0, g2))/d0
+                - 2*gg1*d1/d0**2 - gg*(d2/d0**2 - 2*d1**2/d0**3))
+
+
+class _CrystalClass:
+    """
+    common part of the crystal classes, the constants c, eS and e are linear
+    in the independent constants (the arguments, kept as .constants), their
+    basis gives the structural zeros and ties of the class
+    """
+
+    names = ()
+
+    @classmethod
+    def basis(cls):
+        """
+        return the constants (c, eS, e) of each unit independent constant,
+        stacked as (K, 6, 6), (K, 3, 3) and (K, 3, 6), so that
+        c = np.tensordot(constants, basis()[0], 1)
+        """
+        if "_basis" not in cls.__dict__:
+            units = [cls(*unit) for unit in np.eye(len(cls.names))]
+            cls._basis = tuple(np.stack([getattr(u, name) for u in units])
+                               for name in ("c", "eS", "e"))
+        return cls._basis
+
+    @classmethod
+    def sparsity(cls):
+        """return the masks (c, eS, e) of the structurally nonzero entries"""
+        return tuple(b.any(axis=0) for b in cls.basis())
+
+
+class Isotropic(_CrystalClass):
+    """
+    acoustic properties for isotropic materials, numeric version
+    """
+
+    names = ("c11", "c44", "eSxx")
+
+    # refer to page s 363, 379, Auld's book
+    # relation: c12 = c11 - 2*c44
+    def __init__(self, c11, c44, eSxx):
+        self.constants = np.array([c11, c44, eSxx], dtype=float)
+        c12 = c11 - 2*c44
+        self.c = np.array([
+            [c11, c12, c12, 0, 0, 0],
+            [c12, c11, c12, 0, 0, 0],
+            [c12, c12, c11, 0, 0, 0],
+            [0, 0, 0, c44, 0, 0],
+            [0, 0, 0, 0, c44, 0],
+            [0, 0, 0, 0, 0, c44]
+        ], dtype=float)
+        self.e = np.zeros((3, 6))
+        self.eS = np.diag([eSxx, eSxx, eSxx]).astype(float)
+
+
+class Cubic(_CrystalClass):
+    """
+    acoustic properties for Cubic materials, numeric version
+    Al, Au, Ag, Ni, W
+    """
+
+    names = ("c11", "c12", "c44", "ex4", "eSxx")
+
+    # refer to pages 362, 374, 379, Auld's book
+    def __init__(self, c11, c12, c44, ex4, eSxx):
+        self.constants = np.array([c11, c12, c44, ex4, eSxx], dtype=float)
+        self.c = np.array([
+            [c11, c12, c12, 0, 0, 0],
+            [c12, c11, c12, 0, 0, 0],
+            [c12, c12, c11, 0, 0, 0],
+            [0, 0, 0, c44, 0, 0],
+            [0, 0, 0, 0, c44, 0],
+            [0, 0, 0, 0, 0, c44]
+        ], dtype=float)
+        # for Cubic 23 and -43m
+        self.e = np.array([
+            [0, 0, 0, ex4, 0, 0],
+            [0, 0, 0, 0, ex4, 0],
+            [0, 0, 0, 0, 0, ex4]
+        ], dtype=float)
+        self.eS = np.diag([eSxx, eSxx, eSxx]).astype(float)
+
+
+class Trig3m(_CrystalClass):
+    """
+    acoustic properties for Trig. 3m materials, numeric version
+    LiNbO_3, LiTaO_3
+    """
+
+    names = ("c11", "c12", "c13", "c14", "c33", "c44", "ex5", "ey2", "ez1",
+             "ez3", "eSxx", "eSzz")
+
+    # refer to pages 362, 373, 379, Auld's book
+    def __init__(self, c11, c12, c13, c14, c33, c44,
+                 ex5, ey2, ez1, ez3, eSxx, eSzz):
+        self.constants = np.array(
+            [c11, c12, c13, c14, c33, c44, ex5, ey2, ez1, ez3, eSxx, eSzz],
+            dtype=float)
+        self.c = np.array([
+            [c11, c12, c13, c14, 0, 0],
+            [c12, c11, c13, -c14, 0, 0],
+            [c13, c13, c33, 0, 0, 0],
+            [c14, -c14, 0, c44, 0, 0],
+            [0, 0, 0, 0, c44, c14],
+            [0, 0, 0, 0, c14, 0.5*(c11 - c12)]
+        ], dtype=float)
+        self.e = np.array([
+            [0, 0, 0, 0, ex5, -ey2],
+            [-ey2, ey2, 0, ex5, 0, 0],
+            [ez1, ez1, ez3, 0, 0, 0]
+        ], dtype=float)
+        self.eS = np.diag([eSxx, eSxx, eSzz]).astype(float)
+
+
+class Trig32(_CrystalClass):
+    """
+    acoustic properties for Trig. 32 materials, numeric version
+    Quartz
+    """
+
+    names = ("c11", "c12", "c13", "c14", "c33", "c44", "ex1", "ex4", "eSxx",
+             "eSzz")
+
+    # refer to pages 362, 373, 379, Auld's book
+    def __init__(self, c11, c12, c13, c14, c33, c44,
+                 ex1, ex4, eSxx, eSzz):
+        self.constants = np.array(
+            [c11, c12, c13, c14, c33, c44, ex1, ex4, eSxx, eSzz], dtype=float)
+        self.c = np.array([
+            [c11, c12, c13, c14, 0, 0],
+            [c12, c11, c13, -c14, 0, 0],
+            [c13, c13, c33, 0, 0, 0],
+            [c14, -c14, 0, c44, 0, 0],
+            [0, 0, 0, 0, c44, c14],
+            [0, 0, 0, 0, c14, 0.5*(c11 - c12)]
+        ], dtype=float)
+        self.e = np.array([
+            [ex1, -ex1, 0, ex4, 0, 0],
+            [0, 0, 0, 0, -ex4, -ex1],
+            [0, 0, 0, 0, 0, 0]
+        ], dtype=float)
+        self.eS = np.diag([eSxx, eSxx, eSzz]).astype(float)
+
+
+class Hex6mm(_CrystalClass):
+    """
+    acoustic properties for Hex. 6mm materials, numeric version
+    AlN, ZnO
+    """
+
+    names = ("c11", "c12", "c13", "c33", "c44", "ex5", "ez1", "ez3", "eSxx",
+             "eSzz")
+
+    # refer to pages 362, 373, 379, Auld's book
+    def __init__(self, c11, c12, c13, c33, c44, ex5, ez1, ez3, eSxx, eSzz):
+        self.constants = np.array(
+            [c11, c12, c13, c33, c44, ex5, ez1, ez3, eSxx, eSzz], dtype=float)
+        self.c = np.array([
+            [c11, c12, c13, 0, 0, 0],
+            [c12, c11, c13, 0, 0, 0],
+            [c13, c13, c33, 0, 0, 0],
+            [0, 0, 0, c44, 0, 0],
+            [0, 0, 0, 0, c44, 0],
+            [0, 0, 0, 0, 0, 0.5*(c11 - c12)]
+        ], dtype=float)
+        self.e = np.array([
+            [0, 0, 0, 0, ex5, 0],
+            [0, 0, 0, ex5, 0, 0],
+            [ez1, ez1, ez3, 0, 0, 0]
+        ], dtype=float)
+        self.eS = np.diag([eSxx, eSxx, eSzz]).astype(float)
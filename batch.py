@@ -0,0 +1,155 @@
+"""
+Headless batch runs of the Euler-rotation and impulse-model tools, without
+a display server. Rows are read from CSV or JSONL, processed in chunks with
+the vectorized engines and streamed out in the same format.
+
+    python batch.py euler cuts.csv -o rotated.csv
+    python batch.py impulse designs.jsonl -o designs_out.jsonl
+
+euler rows: material (a name of materials.default_registry()), alpha,
+beta, gamma (deg). The output adds the rotated cE (c11..c66, Pa), e
+(e11..e36, C/m^2) and epsilonS (eS11..eS33, F/m).
+
+impulse rows: freq, nbw (MHz), res (ohm), and either substrate (a name of
+impulse_materials.json) or v (m/s), K2 (%), Co (pF/cm). The output adds
+lambda (um), Np and aperture (um), see impulse_model.py.
+======================================================================
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+
+import numpy as np
+
+import impulse_model
+from materials import default_registry
+
+_EULER_COLUMNS = (
+    [f"c{i}{j}" for i in range(1, 7) for j in range(1, 7)]
+    + [f"e{i}{j}" for i in range(1, 4) for j in range(1, 7)]
+    + [f"eS{i}{j}" for i in range(1, 4) for j in range(1, 4)]
+)
+
+
+def euler_chunk(rows, registry=None):
+    """
+    rotate the materials of a chunk of euler rows, return the output rows
+    """
+    registry = registry or default_registry()
+    names = np.array([row["material"] for row in rows])
+    angles = np.radians([[float(row[k]) for k in ("alpha", "beta", "gamma")]
+                         for row in rows]).reshape(-1, 3)
+    tensors = np.empty((len(rows), len(_EULER_COLUMNS)))
+    for name in np.unique(names):
+        index = np.nonzero(names == name)[0]
+        _, _, c, eS, e = registry.material(name).rot_euler_batch(
+            angles[index])
+        tensors[index] = np.concatenate(
+            [c.reshape(-1, 36), e.reshape(-1, 18), eS.reshape(-1, 9)], axis=1)
+    return [dict(row, **dict(zip(_EULER_COLUMNS, values)))
+            for row, values in zip(rows, tensors.tolist())]
+
+
+def impulse_chunk(rows, registry=None):
+    """
+    design the IDTs of a chunk of impulse rows, return the output rows
+    """
+    registry = registry or default_registry()
+    v, K2, Co = [], [], []
+    for row in rows:
+        if row.get("substrate"):
+            substrate = registry.substrate(row["substrate"])
+            v.append(substrate["velocity"])
+            K2.append(substrate["K2"])
+            Co.append(substrate["Co"])
+        else:
+            v.append(float(row["v"]))
+            K2.append(float(row["K2"])*0.01)
+            Co.append(float(row["Co"]))
+    freq, nbw, res = (np.array([float(row[k]) for row in rows])
+                      for k in ("freq", "nbw", "res"))
+    lambda0, Np, aperture = impulse_model.design(
+        freq, nbw, res, np.array(v), np.array(K2), np.array(Co))
+    return [dict(row, **{"lambda": l, "Np": n, "aperture": a})
+            for row, l, n, a in zip(rows, lambda0.tolist(), Np.tolist(),
+                                    aperture.tolist())]
+
+
+def read_rows(f, fmt):
+    """yield the rows of a CSV or JSONL file as dicts"""
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+    else:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RowWriter:
+    """write rows as CSV (header taken from the first row) or JSONL"""
+
+    def __init__(self, f, fmt):
+        self.f = f
+        self.fmt = fmt
+        self.writer = None
+
+    def write(self, rows):
+        if self.fmt == "jsonl":
+            self.f.writelines(json.dumps(row) + "\n" for row in rows)
+            return
+        if self.writer is None and rows:
+            self.writer = csv.DictWriter(self.f, fieldnames=list(rows[0]))
+            self.writer.writeheader()
+        self.writer.writerows(rows)
+
+
+def run(task, fin, fout, fmt, chunksize=10000):
+    """stream the rows of fin through task in chunks into fout"""
+    rows = read_rows(fin, fmt)
+    writer = RowWriter(fout, fmt)
+    n = 0
+    while True:
+        chunk = list(itertools.islice(rows, chunksize))
+        if not chunk:
+            return n
+        writer.write(task(chunk))
+        n += len(chunk)
+
+
+def _format(path, fmt):
+    """return the format given, or guessed from the file extension"""
+    if fmt:
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("tool", choices=("euler", "impulse"))
+    parser.add_argument("input", help="CSV or JSONL file, - for stdin")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file, default stdout")
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="input/output format, default from extension")
+    parser.add_argument("--chunksize", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    fmt = _format(args.input, args.format)
+    task = euler_chunk if args.tool == "euler" else impulse_chunk
+    fin = sys.stdin if args.input == "-" else open(args.input, newline="")
+    fout = sys.stdout if args.output == "-" else \
+        open(args.output, "w", newline="")
+    try:
+        run(task, fin, fout, fmt, args.chunksize)
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+
+
+if __name__ == "__main__":
+    main()
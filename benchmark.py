@@ -0,0 +1,377 @@
+"""
+Benchmarks of the hot paths: rotations (rot_euler_RM, rot_M, rot_update,
+and the Bond matrix against the full-tensor rotation of rot_tensors),
+cD and Christoffel matrices of the symbolic and numeric materials, the SAW
+velocity search and orientation sweeps of several sizes. The timings are
+compared with the baseline stored for this machine, and the run fails (exit
+status 1) when a case is slower than its baseline by more than the
+threshold.
+
+    python benchmark.py                 # run, compare with the baseline
+    python benchmark.py --save          # run, store as the baseline
+    python benchmark.py -k saw -k sweep --threshold 0.3
+
+Baselines are kept in ~/.cache/acoustics/benchmark_baselines.json (or
+--baselines), outside the source tree, one entry per machine tag (host,
+architecture, python and numpy versions), since timings of different
+machines cannot be compared.
+======================================================================
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+BASELINES = "~/.cache/acoustics/benchmark_baselines.json"
+
+ANGLES = (0.3, np.radians(38), 0.7)
+
+
+def _symbolic_material():
+    """return LN_comsol as a symbolic PiezoMaterial of 'acoustics.py'"""
+    from acoustics import PiezoMaterial
+    from materials import default_registry
+    registry = default_registry()
+    crystal = registry.crystal("LN_comsol", symbolic=True)
+    return PiezoMaterial(registry.record("LN_comsol").density, crystal.c,
+                         crystal.eS, crystal.e)
+
+
+def _numeric_material():
+    """return LN_comsol as a numeric PiezoMaterial"""
+    import copy
+    from materials import default_registry
+    return copy.copy(default_registry().material("LN_comsol"))
+
+
+def _directions(n, seed=0):
+    """return n random unit directions (n, 3)"""
+    l = np.random.default_rng(seed).normal(size=(n, 3))
+    return l/np.linalg.norm(l, axis=1, keepdims=True)
+
+
+def _angles(n, seed=0):
+    """return n random Z-X-Z euler angles (n, 3), rad"""
+    return np.random.default_rng(seed).uniform(0, np.pi, size=(n, 3))
+
+
+# each case sets up its data and returns the callable that is timed
+def sym_rot_euler_RM_float():
+    material = _symbolic_material()
+    return lambda: material.rot_euler_RM(*ANGLES)
+
+
+def sym_rot_euler_RM_symbol():
+    from sympy import symbols
+    material = _symbolic_material()
+    angles = symbols("alpha beta gamma")
+    return lambda: material.rot_euler_RM(*angles)
+
+
+def sym_rot_M():
+    material = _symbolic_material()
+    R, _ = material.rot_euler_RM(*ANGLES)
+    return lambda: material.rot_M(R)
+
+
+def sym_rot_update():
+    import copy
+    material = _symbolic_material()
+    R, M = material.rot_euler_RM(*ANGLES)
+    return lambda: copy.copy(material).rot_update(R, M)
+
+
+def _symbolic_direction():
+    from sympy import Matrix
+    lx, ly, lz = _directions(1)[0].tolist()
+    li = Matrix([[lx, ly, lz]])
+    liK = Matrix([
+        [lx, 0, 0, 0, lz, ly],
+        [0, ly, 0, lz, 0, lx],
+        [0, 0, lz, ly, lx, 0]
+    ])
+    return (li, li.T, liK, liK.T)
+
+
+def sym_cal_cD():
+    material = _symbolic_material()
+    li, lj, _, _ = _symbolic_direction()
+    return lambda: material.cal_cD(li, lj)
+
+
+def sym_cal_Gamma():
+    material = _symbolic_material()
+    li, lj, liK, lLj = _symbolic_direction()
+    return lambda: material.cal_Gamma(li, lj, liK, lLj)
+
+
+def num_rot_euler_RM():
+    material = _numeric_material()
+    return lambda: material.rot_euler_RM(*ANGLES)
+
+
+def num_rot_M_1000():
+    material = _numeric_material()
+    R, _ = material.rot_euler_RM(*_angles(1000).T)
+    return lambda: material.rot_M(R)
+
+
+def num_rot_update():
+    import copy
+    material = _numeric_material()
+    R, M = material.rot_euler_RM(*ANGLES)
+    return lambda: copy.copy(material).rot_update(R, M)
+
+
+def num_rot_euler_batch_1000():
+    material = _numeric_material()
+    angles = _angles(1000)
+    return lambda: material.rot_euler_batch(angles)
+
+
+def _rotate_bond(material, R):
+    """rotate the Voigt constants by R (..., 3, 3) through the Bond matrix"""
+    M = material.rot_M(R)
+    MT = np.swapaxes(M, -1, -2)
+    return (M @ material.stiffness @ MT,
+            R @ material.epsilon @ np.swapaxes(R, -1, -2),
+            R @ material.piezoelec @ MT)
+
+
+def _rotate(method, n=None):
+    material = _numeric_material()
+    R, _ = material.rot_euler_RM(*(np.array(ANGLES) if n is None
+                                   else _angles(n).T))
+    if method == "bond":
+        return lambda: _rotate_bond(material, R)
+    return lambda: material.rot_tensors(R)
+
+
+def num_rotate_bond():
+    return _rotate("bond")
+
+
+def num_rotate_tensor():
+    return _rotate("tensor")
+
+
+def num_rotate_bond_1000():
+    return _rotate("bond", 1000)
+
+
+def num_rotate_tensor_1000():
+    return _rotate("tensor", 1000)
+
+
+def num_cal_cD_batch_1000():
+    material = _numeric_material()
+    l = _directions(1000)
+    return lambda: material.cal_cD_batch(l)
+
+
+def num_cal_Gamma_batch_1000():
+    material = _numeric_material()
+    l = _directions(1000)
+    return lambda: material.cal_Gamma_batch(l)
+
+
+def num_cal_velocity_1000():
+    material = _numeric_material()
+    l = _directions(1000)
+    return lambda: material.cal_velocity(l)
+
+
+def saw_velocity():
+    import saw
+    cut = saw.rotated(_numeric_material(), 0, np.radians(38), 0)
+    return lambda: saw.saw_velocity(cut)
+
+
+def saw_velocities():
+    import saw
+    cut = saw.rotated(_numeric_material(), 0, np.radians(38), 0)
+    return lambda: saw.saw_velocities(cut)
+
+
+def _sweep(n, continuation=False):
+    import sweep
+    material = _numeric_material()
+    # along gamma, the last grid axis, so the continuation gets its lines
+    angles = sweep.euler_grid(0, np.radians(38),
+                              np.radians(np.linspace(0, 180, n)))
+    return lambda: sweep.saw_sweep(material, angles, processes=1,
+                                   continuation=continuation)
+
+
+def sweep_16():
+    return _sweep(16)
+
+
+def sweep_64():
+    return _sweep(64)
+
+
+def sweep_64_continuation():
+    return _sweep(64, continuation=True)
+
+
+CASES = {
+    "sym.rot_euler_RM[float]": sym_rot_euler_RM_float,
+    "sym.rot_euler_RM[symbol]": sym_rot_euler_RM_symbol,
+    "sym.rot_M": sym_rot_M,
+    "sym.rot_update": sym_rot_update,
+    "sym.cal_cD": sym_cal_cD,
+    "sym.cal_Gamma": sym_cal_Gamma,
+    "num.rot_euler_RM": num_rot_euler_RM,
+    "num.rot_M[N=1000]": num_rot_M_1000,
+    "num.rot_update": num_rot_update,
+    "num.rot_euler_batch[N=1000]": num_rot_euler_batch_1000,
+    "num.rotate[bond]": num_rotate_bond,
+    "num.rotate[tensor]": num_rotate_tensor,
+    "num.rotate[bond,N=1000]": num_rotate_bond_1000,
+    "num.rotate[tensor,N=1000]": num_rotate_tensor_1000,
+    "num.cal_cD_batch[N=1000]": num_cal_cD_batch_1000,
+    "num.cal_Gamma_batch[N=1000]": num_cal_Gamma_batch_1000,
+    "num.cal_velocity[N=1000]": num_cal_velocity_1000,
+    "saw.saw_velocity": saw_velocity,
+    "saw.saw_velocities": saw_velocities,
+    "sweep.saw_sweep[N=16]": sweep_16,
+    "sweep.saw_sweep[N=64]": sweep_64,
+    "sweep.saw_sweep[N=64,continuation]": sweep_64_continuation,
+}
+
+
+def machine_tag():
+    """return the tag of the machine the baselines are stored under"""
+    version = ".".join(platform.python_version_tuple()[:2])
+    return (f"{platform.node()}-{platform.machine()}-py{version}-"
+            f"numpy{np.__version__}")
+
+
+def timeit(func, min_time=0.2, repeat=5):
+    """
+    return the best time per call (s) of func over repeat rounds, each
+    round calling it as many times as fit in min_time
+    """
+    func()  # warm up caches, lazy imports and compiled kernels
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time/repeat or number >= 1 << 20:
+            break
+        number *= 2
+    best = elapsed/number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start)/number)
+    return best
+
+
+def run(names, min_time=0.2, repeat=5):
+    """return {name: best time per call} of the cases names"""
+    return {name: timeit(CASES[name](), min_time, repeat) for name in names}
+
+
+def load_baselines(path=BASELINES):
+    """return the stored baselines, {machine tag: entry}"""
+    try:
+        with open(os.path.expanduser(path)) as f_obj:
+            return json.load(f_obj)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, path=BASELINES, tag=None):
+    """store results as the baseline of the machine tag, merging cases"""
+    baselines = load_baselines(path)
+    tag = tag or machine_tag()
+    entry = baselines.setdefault(tag, {"timings": {}})
+    entry["timings"].update(results)
+    entry["date"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    path = os.path.expanduser(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f_obj:
+        json.dump(baselines, f_obj, indent=4, sort_keys=True)
+
+
+def compare(results, baseline, threshold):
+    """
+    return [(name, time, baseline time or None, ratio, regressed)], a case
+    regresses when it is slower than 1 + threshold times its baseline
+    """
+    rows = []
+    for name, t in results.items():
+        t0 = baseline.get(name)
+        ratio = None if t0 is None else t/t0
+        rows.append((name, t, t0, ratio,
+                     ratio is not None and ratio > 1 + threshold))
+    return rows
+
+
+def _format_time(t):
+    """format a time per call with a unit"""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if t >= scale:
+            return f"{t/scale:8.3f} {unit} "
+    return f"{t/1e-9:8.1f} ns "
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="patterns", action="append",
+                        help="run the cases whose name contains a pattern")
+    parser.add_argument("--save", action="store_true",
+                        help="store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown, default 0.2 (20%%)")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="time spent per case and round, s")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--list", action="store_true",
+                        help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if not args.patterns
+             or any(p in name for p in args.patterns)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    tag = machine_tag()
+    baseline = load_baselines(args.baselines).get(tag, {}).get("timings", {})
+    print(f"machine: {tag}")
+    results = {}
+    regressed = []
+    for name in names:
+        results.update(run([name], args.min_time, args.repeat))
+        (_, t, t0, ratio, slow), = compare({name: results[name]}, baseline,
+                                           args.threshold)
+        note = "" if ratio is None else \
+            f"{ratio:6.2f}x baseline{'  REGRESSION' if slow else ''}"
+        print(f"{name:40s}{_format_time(t)}{note}")
+        if slow:
+            regressed.append(name)
+
+    if args.save:
+        save_baseline(results, args.baselines, tag)
+        print(f"baseline saved to {args.baselines}")
+    if regressed and not args.save:
+        print(f"{len(regressed)} regression(s) beyond "
+              f"{args.threshold:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""
+Cache of rotated material tensors and the quantities derived from them
+(Christoffel matrices, cD, SAW velocities). Entries are kept in an in-memory
+LRU of bounded size and, optionally, in an on-disk store so that repeated
+runs and GUI sessions reuse earlier results.
+
+Keys are hashes of the material constants, the rounded Euler angles and the
+kind of quantity, e.g.
+
+    cache = TensorCache(path="~/.cache/acoustics")
+    cut = cache.rotated(LN, 0, np.radians(38), 0)
+    v_free, v_metal = cache.saw_velocities(LN, 0, np.radians(38), 0)
+
+Simplified sympy expressions, which take minutes to derive, are kept on disk
+by ExpressionCache, keyed by crystal class, symbols and operation, e.g.
+
+    cache = ExpressionCache()
+    c, e, eps = rotated_constants("Trig3m", "x", "trigsimp", cache)
+======================================================================
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+import saw
+from acoustics_numeric import pack, unpack
+from materials import CRYSTAL_CLASSES
+from profiling import count
+
+# bump when the stored values change meaning, old entries are then ignored
+CACHE_VERSION = 2
+
+# errors of loading a truncated or corrupt file, or one written by an
+# incompatible numpy or sympy, counted as misses (SympifyError and
+# UnicodeDecodeError are ValueErrors)
+_LOAD_ERRORS = (OSError, pickle.UnpicklingError, EOFError, SyntaxError,
+                ValueError, TypeError, AttributeError, ImportError)
+
+# the symbols of the rotations of rotated_constants
+_ROTATIONS = {"x": ("theta",), "y": ("theta",), "z": ("theta",),
+              "euler": ("alpha", "beta", "gamma")}
+
+
+class TensorCache:
+    """
+    LRU plus on-disk cache keyed by material constants and Euler angles.
+
+    maxsize, number of entries kept in memory,
+    path, directory of the on-disk store, None keeps the cache in memory,
+    decimals, the angles are rounded to this many decimals of a degree
+    """
+
+    def __init__(self, maxsize=1024, path=None, decimals=6):
+        self.maxsize = maxsize
+        self.path = None if path is None else os.path.expanduser(path)
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+
+    def key(self, kind, material, angles, *extra):
+        """return the hash of a quantity of a material rotated by angles"""
+        h = hashlib.sha1(f"{CACHE_VERSION}:{kind}".encode())
+        h.update(np.float64(material.density).tobytes())
+        for name in ("stiffness", "epsilon", "piezoelec"):
+            if hasattr(material, name):
+                h.update(np.ascontiguousarray(
+                    getattr(material, name), dtype=float).tobytes())
+        deg = np.round(np.degrees(np.asarray(angles, dtype=float)),
+                       self.decimals) + 0.0
+        h.update(deg.tobytes())
+        for value in extra:
+            h.update(np.ascontiguousarray(value, dtype=float).tobytes())
+        return h.hexdigest()
+
+    def get(self, key):
+        """return the cached value of key, or None"""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            count("cache.hits")
+            return self._memory[key]
+        if self.path is not None:
+            try:
+                with open(self._file(key), "rb") as f:
+                    value = pickle.load(f)
+            except _LOAD_ERRORS:
+                value = None
+            if value is not None:
+                self.hits += 1
+                count("cache.hits")
+                count("cache.disk_hits")
+                self._remember(key, value)
+                return value
+        self.misses += 1
+        count("cache.misses")
+        return None
+
+    def put(self, key, value):
+        """store value under key in memory and on disk"""
+        self._remember(key, value)
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+            # write then rename, so concurrent processes never read a
+            # partially written entry
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._file(key))
+
+    def clear(self):
+        """empty the in-memory LRU, the on-disk store is kept"""
+        self._memory.clear()
+
+    def cached(self, kind, material, angles, compute, *extra):
+        """return compute() cached under (kind, material, angles, extra)"""
+        key = self.key(kind, material, angles, *extra)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def rotated(self, material, alpha, beta, gamma):
+        """
+        return a copy of the material rotated by Z(alpha)-X(beta)-Z(gamma)
+        euler angles, in rad, see saw.rotated
+        """
+        names = [name for name in ("stiffness", "epsilon", "piezoelec")
+                 if hasattr(material, name)]
+
+        # only the independent components are stored, see
+        # acoustics_numeric.pack
+        def compute():
+            cut = saw.rotated(material, alpha, beta, gamma)
+            return pack(*(getattr(cut, name) for name in names))
+
+        constants = self.cached("rotated", material, (alpha, beta, gamma),
+                                compute)
+        cut = copy.copy(material)
+        for name, tensor in zip(names, unpack(constants)):
+            setattr(cut, name, tensor)
+        return cut
+
+    def cal_Gamma_batch(self, material, alpha, beta, gamma, l):
+        """
+        return the Christoffel matrices (N, 3, 3) of the rotated material
+        for the directions l (N, 3)
+        """
+        def compute():
+            return self.rotated(material, alpha, beta, gamma) \
+                .cal_Gamma_batch(l)
+
+        return self.cached("Gamma", material, (alpha, beta, gamma), compute,
+                           l).copy()
+
+    def cal_cD_batch(self, material, alpha, beta, gamma, l):
+        """
+        return cD (N, 6, 6) of the rotated material for the directions
+        l (N, 3)
+        """
+        def compute():
+            return self.rotated(material, alpha, beta, gamma).cal_cD_batch(l)
+
+        return self.cached("cD", material, (alpha, beta, gamma), compute,
+                           l).copy()
+
+    def saw_velocities(self, material, alpha, beta, gamma):
+        """
+        return (v_free, v_metal) of the SAW on the rotated material,
+        see saw.saw_velocities
+        """
+        def compute():
+            return saw.saw_velocities(
+                self.rotated(material, alpha, beta, gamma))
+
+        return self.cached("saw", material, (alpha, beta, gamma), compute)
+
+    def _remember(self, key, value):
+        """insert into the in-memory LRU, evicting the oldest entry"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _file(self, key):
+        """return the file of key in the on-disk store"""
+        return os.path.join(self.path, key + ".pkl")
+
+
+class ExpressionCache:
+    """
+    On-disk cache of simplified sympy expressions (or matrices) keyed by
+    crystal class, the symbols involved and the operation, plus the cache
+    and sympy versions, so entries of other versions are ignored.
+
+    path, directory of the store,
+    fmt, "srepr" (text, portable between python versions) or "pickle"
+    (faster to load)
+    """
+
+    def __init__(self, path="~/.cache/acoustics/sympy", fmt="srepr"):
+        if fmt not in ("srepr", "pickle"):
+            raise ValueError(f"unknown format '{fmt}'")
+        self.path = os.path.expanduser(path)
+        self.fmt = fmt
+        self.hits = 0
+        self.misses = 0
+        self._memory = {}
+
+    def key(self, crystal_class, symbols, operation, source=None):
+        """
+        return the hash of an operation on expressions of a crystal class,
+        symbols, the symbols (or their names) the result depends on,
+        source, optional input expression, hashed by its srepr
+        """
+        import sympy
+        names = sorted(str(x) for x in symbols)
+        text = f"{CACHE_VERSION}:{sympy.__version__}:{crystal_class}:" \
+            f"{','.join(names)}:{operation}"
+        if source is not None:
+            text += ":" + sympy.srepr(source)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def get(self, key):
+        """return the cached expression of key, or None"""
+        if key in self._memory:
+            self.hits += 1
+            count("expression_cache.hits")
+            return self._memory[key]
+        try:
+            with open(self._file(key), "rb") as f:
+                value = self._load(f.read())
+        except _LOAD_ERRORS:
+            value = None
+        if value is not None:
+            self.hits += 1
+            count("expression_cache.hits")
+            self._memory[key] = value
+            return value
+        self.misses += 1
+        count("expression_cache.misses")
+        return None
+
+    def put(self, key, value):
+        """store an expression under key in memory and on disk"""
+        self._memory[key] = value
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(self._dump(value))
+        os.replace(tmp, self._file(key))
+
+    def cached(self, crystal_class, symbols, operation, compute, source=None):
+        """return compute() cached under (crystal_class, symbols, operation)"""
+        key = self.key(crystal_class, symbols, operation, source)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def simplify(self, crystal_class, expr, operation="trigsimp"):
+        """
+        return expr simplified by the sympy function named operation (e.g.
+        "trigsimp", "simplify", "expand_trig"), elementwise for matrices,
+        cached under the crystal class, the free symbols of expr and expr
+        itself
+        """
+        import sympy
+        function = getattr(sympy, operation)
+
+        def compute():
+            if isinstance(expr, sympy.MatrixBase):
+                return expr.applyfunc(function)
+            return function(expr)
+
+        return self.cached(crystal_class, expr.free_symbols, operation,
+                           compute, source=expr)
+
+    def _dump(self, value):
+        """serialize an expression in the format of the cache"""
+        if self.fmt == "pickle":
+            return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        import sympy
+        return sympy.srepr(value).encode()
+
+    def _load(self, data):
+        """deserialize an expression"""
+        if self.fmt == "pickle":
+            return pickle.loads(data)
+        import sympy
+        return sympy.sympify(data.decode())
+
+    def _file(self, key):
+        """return the file of key in the store"""
+        return os.path.join(self.path, f"{key}.{self.fmt}")
+
+
+def rotated_constants(crystal_class, rotation="z", operation="trigsimp",
+                      cache=None):
+    """
+    return the symbolic (stiffness, piezoelec, epsilon) of a crystal class
+    of 'acoustics.py' with symbolic constants, rotated about "x", "y" or "z"
+    by theta, or by the "euler" angles alpha, beta, gamma, and simplified
+    elementwise by the sympy function named operation (None keeps the
+    product), loaded from cache (an ExpressionCache) when derived before
+    """
+    import sympy
+    import acoustics
+    if rotation not in _ROTATIONS:
+        raise ValueError(f"unknown rotation '{rotation}'")
+    names = CRYSTAL_CLASSES[crystal_class]
+    angles = sympy.symbols(" ".join(_ROTATIONS[rotation]))
+    if rotation != "euler":
+        angles = (angles,)
+
+    def compute():
+        crystal = getattr(acoustics, crystal_class)(
+            *sympy.symbols(" ".join(names)))
+        e = getattr(crystal, "e", sympy.zeros(3, 6))
+        material = acoustics.PiezoMaterial(1, crystal.c, crystal.eS, e)
+        if rotation == "euler":
+            R, M = material.rot_euler_RM(*angles)
+        else:
+            R = getattr(material, f"rot{rotation}_R")(angles[0])
+            M = material.rot_M(R)
+        material.rot_update(R, M)
+        out = (material.stiffness, material.piezoelec, material.epsilon)
+        if operation is None:
+            return out
+        function = getattr(sympy, operation)
+        return tuple(m.applyfunc(function) for m in out)
+
+    if cache is None:
+        return compute()
+
+    def stacked():
+        # stored as one 12x6 matrix, c (6x6), e (3x6), eps (3x3) padded
+        c, e, eps = compute()
+        return sympy.Matrix.vstack(
+            c, e, sympy.Matrix.hstack(eps, sympy.zeros(3, 3)))
+
+    key = f"rotated_constants:{rotation}:{operation}"
+    value = sympy.Matrix(cache.cached(
+        crystal_class, names + tuple(str(x) for x in angles), key, stacked))
+    return (value[:6, :], value[6:9, :], value[9:12, :3])
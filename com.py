@@ -0,0 +1,211 @@
+"""
+Coupling-of-modes (COM) model of SAW resonators and filters built from IDT,
+grating and gap sections, a P-matrix model evaluated for all frequencies at
+once.
+
+Each section maps the forward and backward wave amplitudes (R, S) at its
+left edge, and the voltages of the electrical ports, to the amplitudes at
+its right edge, and adds its current to the port it is connected to,
+
+    [u_right, V, I] = A @ [u_left, V, I],   A = [[T, t, 0],
+                                                 [0, 1, 0],
+                                                 [i, y, 1]],
+
+a matrix of size 2 + 2*ports per frequency. A chain of sections is then a
+product of these matrices, which is associative and is reduced pairwise in
+log2(sections) batched matrix products, see cascade.
+
+Units: frequency in MHz, lengths in um, velocity in m/s, K2 as a fraction
+(not %), Co in pF/cm per finger pair (as in 'impulse_model.py'),
+admittance in S.
+
+References:
+[1] V. Plessky, J. Koskela, Coupling-of-modes analysis of SAW devices,
+Int. J. High Speed Electron. Syst. 10(4) (2000) 867-947.
+[2] D. Morgan, Surface Acoustic Wave Devices, 2nd ed., Academic Press,
+Amsterdam, 2007.
+======================================================================
+"""
+
+import numpy as np
+
+
+def _series(z, L, exact, terms):
+    """
+    return exact(), or the power series sum(terms[k]*(z*L^2)^k) for small
+    z*L^2, where exact loses its precision
+    """
+    x = z*L**2
+    small = np.abs(x) < 1e-4
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = exact()
+    return np.where(small, sum(a*x**k for k, a in enumerate(terms)), value)
+
+
+def section(f, length, period, v, kappa=0.0, alpha=0.0, C=0.0, loss=0.0,
+            port=None, ports=1):
+    """
+    return the cascade matrices (..., n, n), n = 2 + 2*ports, of a COM
+    section for the frequencies f, the numeric arguments are broadcast
+    against each other,
+    length, period, section length and electrode period, um,
+    v, SAW velocity under the electrodes, m/s,
+    kappa, reflectivity per unit length, 1/um,
+    alpha, transduction per unit length, sqrt(S)/um,
+    C, capacitance per unit length, F/um,
+    loss, propagation loss, dB per wavelength (2*period),
+    port, index of the electrical port of an IDT, None for gratings and gaps
+    """
+    f, L, p, v, kappa, alpha, C, loss = np.broadcast_arrays(
+        *[np.asarray(x) for x in
+          (f, length, period, v, kappa, alpha, C, loss)])
+    w = 2*np.pi*f*1e6
+    k0 = np.pi/p
+    # detuning, 1/um, with the attenuation as imaginary part
+    delta = w/v*1e-6 - k0 - 1j*loss*np.log(10)/20/(2*p)
+    kc = np.conj(kappa)
+    ac = np.conj(alpha)
+    z = kappa*kc - delta**2
+    s = np.sqrt(z.astype(complex))
+    ch = np.cosh(s*L)
+    sh = _series(z, L, lambda: np.sinh(s*L)/s/L, (1, 1/6, 1/120))*L
+    c1 = _series(z, L, lambda: (ch - 1)/z/L**2, (1/2, 1/24, 1/720))*L**2
+    c2 = _series(z, L, lambda: (sh - L)/z/L**3, (1/6, 1/120, 1/5040))*L**3
+
+    # du/dx = K u + a V, dI/dx = b u + j w C V, with K^2 = z
+    K = np.stack([np.stack([-1j*delta, 1j*kappa], axis=-1),
+                  np.stack([-1j*kc, 1j*delta], axis=-1)], axis=-2)
+    a = np.stack([1j*alpha, -1j*ac], axis=-1)
+    b = np.stack([-2j*ac, -2j*alpha], axis=-1)
+    eye = np.eye(2)
+    E = ch[..., None, None]*eye + sh[..., None, None]*K
+    # integral of exp(K x) over the section, K^-1 (E - 1)
+    G = sh[..., None, None]*eye + c1[..., None, None]*K
+    t = np.einsum("...ij,...j->...i", G, a)
+    i = np.einsum("...i,...ij->...j", b, G)
+    y = np.einsum("...i,...ij,...j->...", b,
+                  c1[..., None, None]*eye + c2[..., None, None]*K, a) \
+        + 1j*w*C*L
+
+    # amplitudes at the right edge referred to its own origin
+    D = np.stack([np.exp(-1j*k0*L), np.exp(1j*k0*L)], axis=-1)
+    n = 2 + 2*ports
+    A = np.zeros(f.shape + (n, n), dtype=complex)
+    A[..., range(2, n), range(2, n)] = 1
+    A[..., :2, :2] = D[..., :, None]*E
+    if port is not None:
+        A[..., :2, 2 + port] = D*t
+        A[..., 2 + ports + port, :2] = i
+        A[..., 2 + ports + port, 2 + port] = y
+    return A
+
+
+def idt(f, Np, period, v, K2, Co, aperture, r=0.0, loss=0.0, port=0,
+        ports=1):
+    """
+    return the cascade matrices of a uniform single-electrode IDT of Np
+    finger pairs, see section,
+    K2, Co, substrate data of the impulse model, the transduction is set
+    so that the conductance matches it for r = 0,
+    aperture, um,
+    r, reflection coefficient per electrode
+    """
+    lambda0 = 2*np.asarray(period, dtype=float)
+    # capacitance per unit length, one finger pair per wavelength
+    C = np.asarray(Co)*1e-16*aperture/lambda0
+    f0 = np.asarray(v)/lambda0
+    alpha = 2*np.sqrt(K2*f0*1e6*C/lambda0)
+    return section(f, Np*lambda0, period, v, kappa=np.asarray(r)/period,
+                   alpha=alpha, C=C, loss=loss, port=port, ports=ports)
+
+
+def grating(f, N, period, v, r, loss=0.0, ports=1):
+    """
+    return the cascade matrices of a shorted grating of N electrodes,
+    r, reflection coefficient per electrode
+    """
+    return section(f, N*np.asarray(period), period, v,
+                   kappa=np.asarray(r)/period, loss=loss, ports=ports)
+
+
+def gap(f, length, v, period, loss=0.0, ports=1):
+    """
+    return the cascade matrices of a free propagation path, the period only
+    sets the wavelength of the loss
+    """
+    return section(f, length, period, v, loss=loss, ports=ports)
+
+
+def cascade(matrices):
+    """
+    return the cascade matrix of a chain of sections, given from left to
+    right as a list or a stacked array (sections, ..., n, n), reduced
+    pairwise in log2(sections) batched matrix products
+    """
+    A = np.asarray(matrices)
+    while A.shape[0] > 1:
+        if A.shape[0] % 2:
+            eye = np.broadcast_to(np.eye(A.shape[-1]), A.shape[1:])
+            A = np.concatenate([A, eye[None]])
+        A = A[1::2] @ A[0::2]
+    return A[0]
+
+
+def admittance(A):
+    """
+    return the admittance matrices (..., ports, ports) of a chain with the
+    cascade matrix A, no wave entering at either end
+    """
+    ports = (A.shape[-1] - 2)//2
+    V = slice(2, 2 + ports)
+    I = slice(2 + ports, 2 + 2*ports)
+    # u_left = (0, S), u_right = (R, 0): S = -t[1, :] V/T[1, 1]
+    t1 = A[..., 1, V]
+    i1 = A[..., I, 1]
+    return A[..., I, V] - i1[..., :, None]*t1[..., None, :] \
+        / A[..., 1, 1][..., None, None]
+
+
+def s_parameters(Y, z0=50.0):
+    """return the scattering matrices of the admittance matrices Y"""
+    eye = np.eye(Y.shape[-1])
+    return (eye - z0*Y) @ np.linalg.inv(eye + z0*Y)
+
+
+def one_port_resonator(f, v, K2, Co, aperture, period, Np, Ng, r,
+                       gap_length=None, loss=0.0):
+    """
+    return the admittance (S) of a synchronous one-port resonator, an IDT
+    of Np finger pairs between two gratings of Ng electrodes,
+    gap_length, IDT to grating distance, um, default 0 (the electrodes
+    continue at the same pitch)
+    """
+    if gap_length is None:
+        gap_length = 0.0
+    grating_ = grating(f, Ng, period, v, r, loss)
+    gap_ = gap(f, gap_length, v, period, loss)
+    chain = [grating_, gap_, idt(f, Np, period, v, K2, Co, aperture, r, loss),
+             gap_, grating_]
+    return admittance(cascade(chain))[..., 0, 0]
+
+
+def two_port_resonator(f, v, K2, Co, aperture, period, Np, Ng, r,
+                       gap_length=None, center_length=None, loss=0.0):
+    """
+    return the admittance matrices (..., 2, 2) of a two-port resonator, two
+    IDTs of Np finger pairs between two gratings of Ng electrodes,
+    gap_length, IDT to grating distance, um, default 0,
+    center_length, distance between the IDTs, um, default 0
+    """
+    if gap_length is None:
+        gap_length = 0.0
+    if center_length is None:
+        center_length = 0.0
+    grating_ = grating(f, Ng, period, v, r, loss, ports=2)
+    gap_ = gap(f, gap_length, v, period, loss, ports=2)
+    chain = [grating_, gap_,
+             idt(f, Np, period, v, K2, Co, aperture, r, loss, 0, 2),
+             gap(f, center_length, v, period, loss, ports=2),
+             idt(f, Np, period, v, K2, Co, aperture, r, loss, 1, 2),
+             gap_, grating_]
+    return admittance(cascade(chain))
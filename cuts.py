@@ -0,0 +1,440 @@
+"""
+Search of SAW cut orientations. An objective built from the SAW velocities,
+the coupling (acoustics.eval_kt2), the power-flow angle and the temperature
+coefficient of frequency is optimized over the Z-X-Z euler angles under
+bounds on the same quantities: random orientations are screened in a
+process pool, and local (Nelder-Mead) searches started from the best of
+them run in parallel. Infeasible orientations always rank below feasible
+ones, so the constraints need no penalty weights.
+
+    # largest coupling with a power-flow angle within +-0.5 deg
+    best = optimize_cut("LN_comsol", "kt2",
+                        constraints={"pfa": np.radians([-0.5, 0.5])})
+    np.degrees(best["angles"]), best["quantities"]
+
+The search is reduced to the fundamental zone of the crystal class, the
+box of angles holding one of each set of orientations the crystal symmetry
+(and the reciprocity of the SAW, gamma + pi) makes equivalent, see
+fundamental_zone and reduce_angles.
+
+On platforms that spawn the worker processes (Windows, macOS), call the
+optimizer from under an 'if __name__ == "__main__":' guard.
+======================================================================
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+import acoustics_numeric
+from acoustics import eval_kt2
+from materials import default_registry
+from saw import rotated, saw_velocities, saw_velocity, saw_velocity_path
+from temperature import propagation_strain
+
+# quantities of an orientation, v_free and v_metal (m/s), kt2, the
+# power-flow angle pfa (rad, positive toward x2 of the cut) and tcf (1/K)
+QUANTITIES = ("v_free", "v_metal", "kt2", "pfa", "tcf")
+
+
+def _rotation_candidates():
+    """
+    return the proper rotations (K, 3, 3) the point groups are made of, the
+    rotations of the cube and the 2-, 3- and 6-fold ones about z and the
+    2-fold ones about the axes of the x1-x2 plane
+    """
+    material = acoustics_numeric.ElasticMaterial(1, 0, 0)
+    candidates = []
+    for k in range(12):
+        Rz = material.rotz_R(k*np.pi/6)
+        candidates += [Rz, material.rotx_R(np.pi) @ Rz]
+    for perm in ((0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (2, 1, 0),
+                 (1, 0, 2)):
+        for signs in np.ndindex(2, 2, 2):
+            S = np.eye(3)[list(perm)]*(1 - 2*np.array(signs))[:, None]
+            if np.linalg.det(S) > 0:
+                candidates.append(S)
+    return np.unique(np.round(np.array(candidates), 12), axis=0)
+
+
+def symmetry_rotations(crystal_class, seed=0):
+    """
+    return the proper rotations S (K, 3, 3) that leave the SAW of a crystal
+    class unchanged, the cut rotated by R then equals the cut rotated by
+    R*S: the stiffness and permittivity are invariant and the piezoelectric
+    constants invariant or reversed (the SAW depends on e only through the
+    sign-free stiffening)
+    """
+    cls = getattr(acoustics_numeric, crystal_class)
+    rng = np.random.default_rng(seed)
+    crystal = cls(*rng.uniform(1, 2, len(cls.names)))
+    material = acoustics_numeric.PiezoMaterial.from_crystal(1.0, crystal)
+    S = _rotation_candidates()
+    _, _, c, eps, e = material.rot_euler_batch(euler_angles(S))
+
+    def close(a, b):
+        scale = max(np.abs(b).max(), 1.0)
+        return np.all(np.abs(a - b) <= 1e-9*scale, axis=(-2, -1))
+
+    e0 = material.piezoelec
+    keep = close(c, material.stiffness) & close(eps, material.epsilon) & \
+        (close(e, e0) | close(e, -e0))
+    return S[keep]
+
+
+def fundamental_zone(crystal_class):
+    """
+    return the box ((alpha0, alpha1), (beta0, beta1), (gamma0, gamma1)), rad,
+    holding at least one of every set of equivalent cuts of a crystal class:
+    alpha over one period of the n-fold axis along z, beta up to pi/2 when a
+    2-fold axis lies in the x1-x2 plane, and gamma over half a turn, the SAW
+    propagating along -x1 as along x1
+    """
+    S = symmetry_rotations(crystal_class)
+    about_z = np.sum(np.isclose(S[:, 2, 2], 1))
+    in_plane = np.any(np.isclose(S[:, 2, 2], -1))
+    return ((0.0, 2*np.pi/about_z),
+            (0.0, np.pi/2 if in_plane else np.pi),
+            (0.0, np.pi))
+
+
+def euler_angles(R):
+    """
+    return the Z-X-Z euler angles (..., 3), rad, of rotational matrices R
+    (..., 3, 3), the inverse of rot_euler_RM, alpha and gamma in [0, 2 pi)
+    and beta in [0, pi], gamma = 0 where beta is 0 or pi
+    """
+    # R = Rz(gamma)*Rx(beta)*Rz(alpha), row 3 is (sin(beta)*sin(alpha),
+    # -sin(beta)*cos(alpha), cos(beta)), column 3 (sin(beta)*sin(gamma),
+    # sin(beta)*cos(gamma), cos(beta))
+    R = np.asarray(R, dtype=float)
+    beta = np.arccos(np.clip(R[..., 2, 2], -1, 1))
+    gimbal = np.hypot(R[..., 2, 0], R[..., 2, 1]) < 1e-12
+    alpha = np.where(gimbal, np.arctan2(R[..., 0, 1], R[..., 0, 0]),
+                     np.arctan2(R[..., 2, 0], -R[..., 2, 1]))
+    gamma = np.where(gimbal, 0.0, np.arctan2(R[..., 0, 2], R[..., 1, 2]))
+    angles = np.stack([alpha, beta, gamma], axis=-1)
+    wrapped = angles[..., [0, 2]] % (2*np.pi)
+    # -0 rounded off to 2 pi
+    angles[..., [0, 2]] = np.where(wrapped > 2*np.pi - 1e-12, 0.0, wrapped)
+    return angles
+
+
+def reduce_angles(angles, crystal_class, zone=None):
+    """
+    return the cuts equivalent to the Z-X-Z euler angles (..., 3), rad, that
+    lie in the fundamental zone of the crystal class (or in the box zone)
+    """
+    angles = np.asarray(angles, dtype=float)
+    zone = np.array(fundamental_zone(crystal_class) if zone is None
+                    else zone)
+    material = acoustics_numeric.ElasticMaterial(1, 0, 0)
+    flat = angles.reshape(-1, 3)
+    R, _ = material.rot_euler_RM(flat[:, 0], flat[:, 1], flat[:, 2])
+    S = symmetry_rotations(crystal_class)
+    # the reversed propagation, rotated by pi about the cut normal
+    L = np.stack([np.eye(3), material.rotz_R(np.pi)])
+    equivalent = euler_angles(L[:, None, None] @ R[None, :, None]
+                              @ S[None, None, :])
+    # (N, 2K, 3), the first equivalent inside the zone of each cut
+    equivalent = np.swapaxes(equivalent, 0, 1).reshape(len(flat), -1, 3)
+    tol = 1e-9
+    inside = np.all((equivalent >= zone[:, 0] - tol)
+                    & (equivalent <= zone[:, 1] + tol), axis=-1)
+    # off the upper ends where possible, alpha = 2 pi/n is alpha = 0
+    below = np.all(equivalent < zone[:, 1] - tol, axis=-1)
+    first = equivalent[np.arange(len(flat)),
+                       np.argmax(2*inside + (inside & below), axis=-1)]
+    out = np.where(np.any(inside, axis=-1)[:, None], first, flat)
+    return out.reshape(angles.shape)
+
+
+class _Problem:
+    """
+    the quantities to evaluate and how to rank them, sent to the workers,
+    see optimize_cut
+    """
+
+    def __init__(self, material, objective, maximize, constraints,
+                 thermal=None, step=np.radians(0.1)):
+        self.material = material
+        self.objective = objective
+        self.sign = -1.0 if maximize else 1.0
+        self.constraints = {key: (-np.inf if lo is None else lo,
+                                  np.inf if hi is None else hi)
+                            for key, (lo, hi) in constraints.items()}
+        # (record, temperatures T0 -+ dT, materials at them)
+        self.thermal = thermal
+        self.step = step
+        self.needs = {objective} | set(constraints)
+        unknown = self.needs - set(QUANTITIES)
+        if unknown:
+            raise ValueError(f"unknown quantities {sorted(unknown)}, "
+                             f"expected some of {QUANTITIES}")
+        if "tcf" in self.needs and thermal is None:
+            raise ValueError("tcf needs a material with temperature "
+                             "coefficients")
+
+    def evaluate(self, angles):
+        """return the quantities needed at the euler angles (3,), rad"""
+        alpha, beta, gamma = angles
+        q = {}
+        if "pfa" in self.needs:
+            # psi = arctan(dv/dgamma/v), the propagation direction turns
+            # toward x2 with gamma, the neighbouring cuts are continued
+            path = [(alpha, beta, gamma + k*self.step) for k in (-1, 0, 1)]
+            v = saw_velocity_path(self.material, path)
+            q["v_free"] = v[1]
+            q["pfa"] = np.arctan((v[2] - v[0])/(2*self.step*v[1]))
+        if self.needs & {"v_metal", "kt2"}:
+            cut = rotated(self.material, alpha, beta, gamma)
+            if "v_free" in q:
+                q["v_metal"] = saw_velocity(cut, "metal")
+            else:
+                q["v_free"], q["v_metal"] = saw_velocities(cut)
+            q["kt2"] = eval_kt2(q["v_free"], q["v_metal"])
+        elif "v_free" not in q:
+            q["v_free"] = saw_velocity(
+                rotated(self.material, alpha, beta, gamma))
+        if "tcf" in self.needs:
+            # f = v/lambda, see temperature.tcf_map
+            record, temperatures, materials = self.thermal
+            f = [saw_velocity(rotated(m, alpha, beta, gamma))
+                 / (1 + propagation_strain(self.material, record, angles, T))
+                 for T, m in zip(temperatures, materials)]
+            q["tcf"] = (f[1] - f[0]) / \
+                ((temperatures[1] - temperatures[0])*q["v_free"])
+        return {key: float(value) for key, value in q.items()}
+
+    def rank(self, q):
+        """
+        return the sort key (violation, objective) of quantities q, lower is
+        better, nan quantities (no SAW found) rank last
+        """
+        violation = 0.0
+        for key, (lo, hi) in self.constraints.items():
+            width = hi - lo if np.isfinite(hi - lo) else \
+                max(abs(lo) if np.isfinite(lo) else 0.0,
+                    abs(hi) if np.isfinite(hi) else 0.0, 1.0)
+            violation += (max(lo - q[key], 0.0) + max(q[key] - hi, 0.0))/width
+        value = self.sign*q[self.objective]
+        if np.isnan(violation) or np.isnan(value):
+            return (np.inf, np.inf)
+        return (violation, value)
+
+
+def _screen(problem, angles):
+    """evaluate a chunk of (M, 3) angles, return [(key, quantities)]"""
+    out = []
+    for angle in angles:
+        q = problem.evaluate(angle)
+        out.append((problem.rank(q), q))
+    return out
+
+
+def nelder_mead(f, x0, step, bounds, maxiter=200, xtol=1e-4):
+    """
+    minimize f over the box bounds (D, 2) from x0 (D,) with an initial
+    simplex of the sizes step (D,), f returning comparable keys (e.g. the
+    (violation, objective) tuples of the cut search), the points are
+    clipped to the box,
+    return (x, key, evaluations)
+    """
+    bounds = np.asarray(bounds, dtype=float)
+
+    def clip(x):
+        return np.clip(x, bounds[:, 0], bounds[:, 1])
+
+    x0 = clip(np.asarray(x0, dtype=float))
+    # step inward where x0 lies on the upper bound
+    step = np.where(x0 + step > bounds[:, 1], -step, step)
+    simplex = [x0] + [clip(x0 + np.eye(len(x0))[k]*step[k])
+                      for k in range(len(x0))]
+    keys = [f(x) for x in simplex]
+    evaluations = len(simplex)
+    for _ in range(maxiter):
+        order = sorted(range(len(simplex)), key=keys.__getitem__)
+        simplex = [simplex[k] for k in order]
+        keys = [keys[k] for k in order]
+        if np.max(np.abs(np.array(simplex[1:]) - simplex[0])) < xtol:
+            break
+        centroid = np.mean(simplex[:-1], axis=0)
+        reflected = clip(2*centroid - simplex[-1])
+        key = f(reflected)
+        evaluations += 1
+        if key < keys[0]:
+            expanded = clip(3*centroid - 2*simplex[-1])
+            key_e = f(expanded)
+            evaluations += 1
+            simplex[-1], keys[-1] = (expanded, key_e) if key_e < key \
+                else (reflected, key)
+        elif key < keys[-2]:
+            simplex[-1], keys[-1] = reflected, key
+        else:
+            contracted = clip(0.5*(centroid + (reflected if key < keys[-1]
+                                               else simplex[-1])))
+            key_c = f(contracted)
+            evaluations += 1
+            if key_c < min(key, keys[-1]):
+                simplex[-1], keys[-1] = contracted, key_c
+            else:
+                # shrink toward the best point
+                for k in range(1, len(simplex)):
+                    simplex[k] = 0.5*(simplex[0] + simplex[k])
+                    keys[k] = f(simplex[k])
+                evaluations += len(simplex) - 1
+    best = min(range(len(simplex)), key=keys.__getitem__)
+    return (simplex[best], keys[best], evaluations)
+
+
+def _local(problem, x0, zone, maxiter, xtol):
+    """
+    run one local search from the euler angles x0 over the free angles of
+    the box zone (3, 2), return (angles, key, quantities, evaluations)
+    """
+    free = zone[:, 1] > zone[:, 0]
+    angles = np.array(x0, dtype=float)
+    cache = {}
+
+    def f(x):
+        angles[free] = x
+        point = tuple(np.round(angles, 12))
+        if point not in cache:
+            cache[point] = problem.evaluate(angles)
+        return problem.rank(cache[point])
+
+    step = 0.1*(zone[free, 1] - zone[free, 0])
+    x, key, evaluations = nelder_mead(f, angles[free], step, zone[free],
+                                      maxiter, xtol)
+    angles[free] = x
+    return (angles.copy(), key, cache[tuple(np.round(angles, 12))],
+            evaluations)
+
+
+def _map(function, args, processes):
+    """return [function(*a) for a in args], in a process pool if processes"""
+    if processes == 1:
+        return [function(*a) for a in args]
+    # imported here, the process pool is not needed by serial searches
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(function, *zip(*args)))
+
+
+def optimize_cut(name, objective, maximize=True, constraints=None,
+                 zone=True, bounds=None, samples=256, starts=8,
+                 processes=None, seed=0, maxiter=200, xtol=1e-4, dT=30.0,
+                 registry=None):
+    """
+    search the euler angles of the best SAW cut of a material,
+    name, a material of the registry,
+    objective, the quantity to optimize, one of QUANTITIES,
+    maximize, maximize the objective, else minimize it,
+    constraints, {quantity: (lower, upper)} bounds, None for no bound,
+    e.g. {"pfa": np.radians([-0.5, 0.5])},
+    zone, search the fundamental zone of the crystal class only (see
+    fundamental_zone), else all angles in [0, 2 pi] x [0, pi] x [0, 2 pi],
+    bounds, optional ((alpha0, alpha1), (beta0, beta1), (gamma0, gamma1))
+    intersected with the zone, equal ends fix an angle,
+    samples, number of random orientations screened,
+    starts, number of local searches, from the best screened orientations,
+    processes, number of worker processes, default all cores,
+    dT, temperature step (K) about T0 of the tcf
+    return a dict, "angles" (3,) rad, "quantities", "feasible" and "runs",
+    the [(angles, key, quantities, evaluations)] of the local searches,
+    best first, the angles reduced to the zone
+    """
+    registry = registry or default_registry()
+    record = registry.record(name)
+    material = registry.material(name)
+    thermal = None
+    if record.temperature is not None:
+        temperatures = (record.T0 - dT, record.T0 + dT)
+        thermal = (record, temperatures,
+                   [registry.material(name, T) for T in temperatures])
+    problem = _Problem(material, objective, maximize, constraints or {},
+                       thermal)
+
+    box = np.array(fundamental_zone(record.crystal_class) if zone else
+                   ((0, 2*np.pi), (0, np.pi), (0, 2*np.pi)), dtype=float)
+    if bounds is not None:
+        bounds = np.array(bounds, dtype=float)
+        box = np.stack([np.maximum(box[:, 0], bounds[:, 0]),
+                        np.minimum(box[:, 1], bounds[:, 1])], axis=-1)
+        fixed = bounds[:, 0] == bounds[:, 1]
+        box[fixed] = bounds[fixed]
+        if np.any(box[:, 0] > box[:, 1]):
+            raise ValueError("bounds do not intersect the search zone")
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    # screen random orientations, one chunk per worker
+    rng = np.random.default_rng(seed)
+    points = box[:, 0] + (box[:, 1] - box[:, 0])*rng.random((samples, 3))
+    chunks = np.array_split(points, min(processes, samples))
+    screened = [item for chunk in _map(_screen, [(problem, c) for c in chunks],
+                                       processes)
+                for item in chunk]
+    order = sorted(range(samples), key=lambda k: screened[k][0])
+
+    # local searches from the best screened orientations
+    runs = _map(_local, [(problem, points[k], box, maxiter, xtol)
+                         for k in order[:starts]], processes)
+    runs.sort(key=lambda run: run[1])
+    if zone:
+        runs = [(reduce_angles(angles, record.crystal_class), key, q, n)
+                for angles, key, q, n in runs]
+    angles, key, q, _ = runs[0]
+    return {"angles": angles, "quantities": q, "feasible": key[0] == 0,
+            "runs": runs}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    registry = default_registry()
+    parser.add_argument("material",
+                        choices=[name for name in registry.names()
+                                 if registry.record(name).density
+                                 and registry.record(name).crystal_class],
+                        help="a material of the registry with a density")
+    parser.add_argument("objective", choices=QUANTITIES)
+    parser.add_argument("--minimize", action="store_true")
+    parser.add_argument("--constraint", nargs=3, action="append",
+                        default=[], metavar=("QUANTITY", "LOWER", "UPPER"),
+                        help="bound a quantity, pfa in deg, 'none' for no "
+                             "bound, e.g. --constraint pfa -0.5 0.5")
+    parser.add_argument("--full", action="store_true",
+                        help="search all angles, not the fundamental zone")
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument("--starts", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    constraints = {}
+    for key, *ends in args.constraint:
+        ends = [None if end.lower() == "none" else float(end)
+                for end in ends]
+        if key == "pfa":
+            ends = [None if end is None else np.radians(end)
+                    for end in ends]
+        constraints[key] = tuple(ends)
+    best = optimize_cut(args.material, args.objective, not args.minimize,
+                        constraints, zone=not args.full,
+                        samples=args.samples, starts=args.starts,
+                        processes=args.processes, seed=args.seed)
+    alpha, beta, gamma = np.degrees(best["angles"])
+    print(f"euler angles (deg): {alpha:.3f}, {beta:.3f}, {gamma:.3f}"
+          f"{'' if best['feasible'] else '  (constraints not met)'}")
+    for key, value in best["quantities"].items():
+        if key == "pfa":
+            print(f"{key:8s}{np.degrees(value):14.4f} deg")
+        else:
+            print(f"{key:8s}{value:14.6g}")
+    return 0 if best["feasible"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
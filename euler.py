@@ -3,20 +3,46 @@
 import sys
 import os
 import numpy as np
-import json
-from sympy import Matrix, cos, sin, Rational, pprint, ones
 
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel,
     QTableWidgetItem)
 from PyQt5.QtGui import QIcon, QPixmap
 
 from euler_ui import Ui_MainWindow
 
-from acoustics import LN_auld as LN
-from acoustics import PiezoMaterial, Trig3m, Trig32, Hex6mm
-from acoustics import Trig3m, Trig32
+from acoustics import epsilon_0
+from acoustics_numeric import PiezoMaterial
+from materials import default_registry
+
+# delay between the last angle change and the rotation, ms
+DEBOUNCE_MS = 30
+
+
+class RotationWorker(QObject):
+    """rotates the constants off the GUI thread with the numeric engine"""
+
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    @pyqtSlot(object, object)
+    def rotate(self, constants, angles):
+        # constants (c, e, eS) and angles (alpha, beta, gamma) in rad
+        try:
+            c, e, eS = constants
+            rho = 4700e3  # dummy
+            piezoMaterial = PiezoMaterial(rho, c, eS, e)
+            piezoMaterial.rot_euler_update(*angles)
+            self.finished.emit((piezoMaterial.stiffness,
+                                piezoMaterial.piezoelec,
+                                piezoMaterial.epsilon))
+        except Exception as exc:
+            self.failed.emit(str(exc))
+
 
 class MyMainWindow(QMainWindow, Ui_MainWindow):
+    rotateRequested = pyqtSignal(object, object)
+
     def __init__(self):
         super().__init__()
 
@@ -24,146 +50,167 @@ class MyMainWindow(QMainWindow, Ui_MainWindow):
         self.setupUi(self)
 
         # make some local modifications
-        self.readJson()
+        self.registry = default_registry()
 
         for i in range(6):
             for j in range(6):
                 self.table_cE.setItem(i, j, QTableWidgetItem(str("0.0")))
                 self.table_cE2.setItem(i, j, QTableWidgetItem(str("0.0")))
-        
+
         for i in range(3):
             for j in range(6):
                 self.table_e.setItem(i, j, QTableWidgetItem(str("0.0")))
                 self.table_e2.setItem(i, j, QTableWidgetItem(str("0.0")))
-        
+
         for i in range(3):
             for j in range(3):
                 self.table_eS.setItem(i, j, QTableWidgetItem(str("0.0")))
                 self.table_eS2.setItem(i, j, QTableWidgetItem(str("0.0")))
 
+        # the rotation runs in a worker thread, one request at a time, the
+        # latest request that arrives meanwhile is kept and sent next
+        self.constants = None
+        self.busy = False
+        self.pending = None
+        self.rotationThread = QThread(self)
+        self.rotationWorker = RotationWorker()
+        self.rotationWorker.moveToThread(self.rotationThread)
+        self.rotateRequested.connect(self.rotationWorker.rotate)
+        self.rotationWorker.finished.connect(self.showRotated)
+        self.rotationWorker.failed.connect(self.rotationFailed)
+        self.rotationThread.start()
+
+        # angle changes are collected for DEBOUNCE_MS before rotating
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self.rotate)
+
+        self.sliders = (self.horizontalSlider_alpha,
+                        self.horizontalSlider_beta,
+                        self.horizontalSlider_gamma)
+        self.lineEdits = (self.lineEdit_alpha, self.lineEdit_beta,
+                          self.lineEdit_gamma)
 
         # connect up the buttons
         self.pushButton.clicked.connect(self.rotate)
         self.comboBox.currentTextChanged.connect(self.itemSelected)
-    
-    # read .json file
-    def readJson(self):
-        self.json_file = "euler_materials.json"
-        with open(self.json_file) as f_obj:
-            self.materials = json.load(f_obj)
-    
+        for slider, lineEdit in zip(self.sliders, self.lineEdits):
+            slider.valueChanged.connect(self.sliderMoved)
+            lineEdit.editingFinished.connect(self.angleEdited)
+        for table in (self.table_cE, self.table_e, self.table_eS):
+            table.itemChanged.connect(self.constantsChanged)
+
+    # write a matrix into the existing items of a table, repainting once
+    def fillTable(self, table, values, fmt):
+        table.setUpdatesEnabled(False)
+        table.blockSignals(True)
+        try:
+            for (i, j), value in np.ndenumerate(values):
+                table.item(i, j).setText(format(float(value), fmt))
+        finally:
+            table.blockSignals(False)
+            table.setUpdatesEnabled(True)
+
     def itemSelected(self):
         item = self.comboBox.currentText()
-        if item == "LiNbO_3":  # Trig3m
-            self.material = Trig3m(self.materials[item]["c11"],
-                                   self.materials[item]["c12"],
-                                   self.materials[item]["c13"],
-                                   self.materials[item]["c14"],
-                                   self.materials[item]["c33"],
-                                   self.materials[item]["c44"],
-                                   self.materials[item]["ex5"],
-                                   self.materials[item]["ey2"],
-                                   self.materials[item]["ez1"],
-                                   self.materials[item]["ez3"],
-                                   self.materials[item]["eSxx"],
-                                   self.materials[item]["eSzz"],
-                                   )
-            for i in range(6):
-                for j in range(6):
-                    self.table_cE.setItem(i, j, QTableWidgetItem(str(float(self.material.c[i, j]))))
-            
-            for i in range(3):
-                for j in range(6):
-                    self.table_e.setItem(i, j, QTableWidgetItem(str(float(self.material.e[i, j]))))
-            
-            for i in range(3):
-                for j in range(3):
-                    self.table_eS.setItem(i, j, QTableWidgetItem(str(float(self.material.eS[i, j]))))
-        
-        elif item == "Quartz":  # Trig32
-            self.material = Trig32(self.materials[item]["c11"],
-                                   self.materials[item]["c12"],
-                                   self.materials[item]["c13"],
-                                   self.materials[item]["c14"],
-                                   self.materials[item]["c33"],
-                                   self.materials[item]["c44"],
-                                   self.materials[item]["ex1"],
-                                   self.materials[item]["ex4"],
-                                   self.materials[item]["eSxx"],
-                                   self.materials[item]["eSzz"],
-                                   )
-            for i in range(6):
-                for j in range(6):
-                    self.table_cE.setItem(i, j, QTableWidgetItem(str(float(self.material.c[i, j]))))
-            
-            for i in range(3):
-                for j in range(6):
-                    self.table_e.setItem(i, j, QTableWidgetItem(str(float(self.material.e[i, j]))))
-            
-            for i in range(3):
-                for j in range(3):
-                    self.table_eS.setItem(i, j, QTableWidgetItem(str(float(self.material.eS[i, j]))))
-        
+        record = self.registry.records.get(item)
+        if record is not None and record.crystal_class is not None:
+            self.material = self.registry.crystal(item)
+            # display in the units of euler_materials.json, GPa and relative
+            c = np.array(self.material.c, dtype=float)*1e-9
+            e = np.array(self.material.e, dtype=float)
+            eS = np.array(self.material.eS, dtype=float)/epsilon_0
         else:
-            for i in range(6):
-                for j in range(6):
-                    self.table_cE.setItem(i, j, QTableWidgetItem(str("0.0")))
-            
-            for i in range(3):
-                for j in range(6):
-                    self.table_e.setItem(i, j, QTableWidgetItem(str("0.0")))
-            
-            for i in range(3):
-                for j in range(3):
-                    self.table_eS.setItem(i, j, QTableWidgetItem(str("0.0")))
-    
-    def rotate(self):
-        self.c = ones(6, 6)
-        self.e = ones(3, 6)
-        self.eS = ones(3, 3)
-
-        for i in range(6):
-            for j in range(6):
-                self.c[i,j] = float(self.table_cE.item(i, j).text())
-
-        for i in range(3):
-            for j in range(6):
-                self.e[i,j] = float(self.table_e.item(i, j).text())
-        
-        for i in range(3):
-            for j in range(3):
-                self.eS[i,j] = float(self.table_eS.item(i, j).text())
-        
-        self.alpha = float(self.lineEdit_alpha.text())/180*np.pi
-        self.beta = float(self.lineEdit_beta.text())/180*np.pi
-        self.gamma = float(self.lineEdit_gamma.text())/180*np.pi
-        self.rho = 4700e3  # dummy
-
-        self.piezoMaterial = PiezoMaterial(self.rho, self.c, self.eS, self.e)
-        self.piezoMaterial.rot_euler_update(self.alpha, self.beta, self.gamma)
+            c, e, eS = np.zeros((6, 6)), np.zeros((3, 6)), np.zeros((3, 3))
+
+        self.fillTable(self.table_cE, np.round(c, 9), "")
+        self.fillTable(self.table_e, np.round(e, 9), "")
+        self.fillTable(self.table_eS, np.round(eS, 9), "")
+        self.constantsChanged()
+
+    # the input tables are read again on the next rotation only
+    def constantsChanged(self, item=None):
+        self.constants = None
+        self.angleChanged()
+
+    def readConstants(self):
+        if self.constants is None:
+            self.constants = tuple(
+                np.array([[float(table.item(i, j).text())
+                           for j in range(table.columnCount())]
+                          for i in range(table.rowCount())])
+                for table in (self.table_cE, self.table_e, self.table_eS))
+        return self.constants
+
+    def sliderMoved(self):
+        for slider, lineEdit in zip(self.sliders, self.lineEdits):
+            if slider is self.sender():
+                lineEdit.setText(str(float(slider.value())))
+        self.angleChanged()
+
+    def angleEdited(self):
+        for slider, lineEdit in zip(self.sliders, self.lineEdits):
+            if lineEdit is self.sender():
+                try:
+                    value = float(lineEdit.text())
+                except ValueError:
+                    continue
+                slider.blockSignals(True)
+                slider.setValue(int(round((value + 180) % 360 - 180)))
+                slider.blockSignals(False)
+        self.angleChanged()
+
+    def angleChanged(self):
+        if self.checkBox_live.isChecked():
+            self.timer.start()
 
-        for i in range(6):
-            for j in range(6):
-                self.table_cE2.setItem(i, j, QTableWidgetItem(str(format(float(self.piezoMaterial.stiffness[i, j]),'.1f'))))
-        
-        for i in range(3):
-            for j in range(6):
-                self.table_e2.setItem(i, j, QTableWidgetItem(str(format(float(self.piezoMaterial.piezoelec[i, j]),'.1f'))))
-        
-        for i in range(3):
-            for j in range(3):
-                self.table_eS2.setItem(i, j, QTableWidgetItem(str(format(float(self.piezoMaterial.epsilon[i, j]),'.1f'))))
-
-
-
-
-    
-
-        # self.lineEdit_v.setText(str(self.materials[item]["velocity"]))
-        # self.lineEdit_K2.setText(str(self.materials[item]["K2"]))
-        # self.lineEdit_Co.setText(str(self.materials[item]["Co"]))
+    def rotate(self):
+        self.timer.stop()
+        try:
+            constants = self.readConstants()
+            angles = tuple(np.radians(float(lineEdit.text()))
+                           for lineEdit in self.lineEdits)
+        except ValueError as exc:
+            self.showError(str(exc))
+            return
+        if self.busy:
+            self.pending = (constants, angles)
+        else:
+            self.busy = True
+            self.rotateRequested.emit(constants, angles)
 
-app = QApplication(sys.argv)
-window = MyMainWindow()
-window.show()
-sys.exit(app.exec())
\ No newline at end of file
+    # send the request kept while the worker was busy, if any
+    def nextRequest(self):
+        if self.pending is None:
+            self.busy = False
+        else:
+            self.rotateRequested.emit(*self.pending)
+            self.pending = None
+
+    def showRotated(self, rotated):
+        self.nextRequest()
+        stiffness, piezoelec, epsilon = rotated
+        self.fillTable(self.table_cE2, stiffness, ".1f")
+        self.fillTable(self.table_e2, piezoelec, ".1f")
+        self.fillTable(self.table_eS2, epsilon, ".1f")
+        self.statusbar.clearMessage()
+
+    def rotationFailed(self, message):
+        self.nextRequest()
+        self.showError(message)
+
+    def showError(self, message):
+        self.statusbar.showMessage(message)
+
+    def closeEvent(self, event):
+        self.rotationThread.quit()
+        self.rotationThread.wait()
+        super().closeEvent(event)
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = MyMainWindow()
+    window.show()
+    sys.exit(app.exec())
@@ -237,6 +237,40 @@ class Ui_MainWindow(object):
         self.label_13.setPixmap(QtGui.QPixmap("assets/euler.png"))
         self.label_13.setScaledContents(True)
         self.label_13.setObjectName("label_13")
+        self.groupBox_4 = QtWidgets.QGroupBox(self.centralwidget)
+        self.groupBox_4.setGeometry(QtCore.QRect(420, 490, 181, 211))
+        self.groupBox_4.setObjectName("groupBox_4")
+        self.checkBox_live = QtWidgets.QCheckBox(self.groupBox_4)
+        self.checkBox_live.setGeometry(QtCore.QRect(10, 30, 161, 20))
+        self.checkBox_live.setChecked(True)
+        self.checkBox_live.setObjectName("checkBox_live")
+        self.label_7 = QtWidgets.QLabel(self.groupBox_4)
+        self.label_7.setGeometry(QtCore.QRect(10, 60, 161, 16))
+        self.label_7.setObjectName("label_7")
+        self.horizontalSlider_alpha = QtWidgets.QSlider(self.groupBox_4)
+        self.horizontalSlider_alpha.setGeometry(QtCore.QRect(10, 80, 161, 22))
+        self.horizontalSlider_alpha.setMinimum(-180)
+        self.horizontalSlider_alpha.setMaximum(180)
+        self.horizontalSlider_alpha.setOrientation(QtCore.Qt.Orientation.Horizontal)
+        self.horizontalSlider_alpha.setObjectName("horizontalSlider_alpha")
+        self.label_8 = QtWidgets.QLabel(self.groupBox_4)
+        self.label_8.setGeometry(QtCore.QRect(10, 110, 161, 16))
+        self.label_8.setObjectName("label_8")
+        self.horizontalSlider_beta = QtWidgets.QSlider(self.groupBox_4)
+        self.horizontalSlider_beta.setGeometry(QtCore.QRect(10, 130, 161, 22))
+        self.horizontalSlider_beta.setMinimum(-180)
+        self.horizontalSlider_beta.setMaximum(180)
+        self.horizontalSlider_beta.setOrientation(QtCore.Qt.Orientation.Horizontal)
+        self.horizontalSlider_beta.setObjectName("horizontalSlider_beta")
+        self.label_9 = QtWidgets.QLabel(self.groupBox_4)
+        self.label_9.setGeometry(QtCore.QRect(10, 160, 161, 16))
+        self.label_9.setObjectName("label_9")
+        self.horizontalSlider_gamma = QtWidgets.QSlider(self.groupBox_4)
+        self.horizontalSlider_gamma.setGeometry(QtCore.QRect(10, 180, 161, 22))
+        self.horizontalSlider_gamma.setMinimum(-180)
+        self.horizontalSlider_gamma.setMaximum(180)
+        self.horizontalSlider_gamma.setOrientation(QtCore.Qt.Orientation.Horizontal)
+        self.horizontalSlider_gamma.setObjectName("horizontalSlider_gamma")
         MainWindow.setCentralWidget(self.centralwidget)
         self.menubar = QtWidgets.QMenuBar(MainWindow)
         self.menubar.setGeometry(QtCore.QRect(0, 0, 1024, 24))
@@ -397,6 +431,11 @@ class Ui_MainWindow(object):
         self.table_eS2.setSortingEnabled(False)
         self.table_eS2.setSortingEnabled(__sortingEnabled)
         self.pushButton.setText(_translate("MainWindow", "Rotate (xyz to XYZ)"))
+        self.groupBox_4.setTitle(_translate("MainWindow", "Live Rotation"))
+        self.checkBox_live.setText(_translate("MainWindow", "rotate on angle change"))
+        self.label_7.setText(_translate("MainWindow", "alpha (deg)"))
+        self.label_8.setText(_translate("MainWindow", "beta (deg)"))
+        self.label_9.setText(_translate("MainWindow", "gamma (deg)"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+"""
+One-dimensional model of thin-film bulk acoustic resonators (FBAR, SMR).
+The piezoelectric film is excited in its thickness-extensional mode, and the
+layers on both sides of it (electrodes, Bragg reflector, substrate) are
+acoustic transmission lines that transform the load impedance layer by layer
+up to the faces of the film, where the electrical input impedance follows
+from the Mason model in closed form.
+
+All functions broadcast frequencies against layer thicknesses, e.g. f of
+shape (F,) and a thickness of shape (N, 1) give impedances of shape (N, F).
+Units are SI: frequency in Hz, thickness in m, area in m^2, density in
+kg/m^3, stiffness in Pa.
+
+    AlN = default_registry().material("AlN_comsol")
+    Z = fbar_impedance(f, AlN, 1.2e-6, 200e-6**2,
+                       top=[("Mo", 0.2e-6)], bottom=[("Mo", 0.2e-6)])
+    fs, fp = resonances(f, Z)
+
+References:
+[1] K.M. Lakin, G.R. Kline, K.T. McCarron, High-Q microwave acoustic
+resonators and filters, IEEE Trans. Microw. Theory Tech. 41(12) (1993)
+2139-2146.
+[2] J.F. Rosenbaum, Bulk acoustic wave theory and devices, Artech House,
+Boston, 1988.
+======================================================================
+"""
+
+import numpy as np
+
+# density (kg/m^3) and longitudinal stiffness c33 (Pa) of common electrode
+# and reflector layers, polycrystalline or amorphous films
+LAYERS = {
+    "Al": (2700, 1.11e11),
+    "Mo": (10200, 4.19e11),
+    "W": (19300, 5.28e11),
+    "Pt": (21400, 3.83e11),
+    "Au": (19300, 2.07e11),
+    "Ru": (12400, 5.62e11),
+    "SiO2": (2200, 7.84e10),
+    "Si3N4": (3100, 3.05e11),
+    "Si": (2330, 1.66e11),
+}
+
+
+def thickness_constants(material):
+    """
+    return (rho, c33D, e33, eps33S, kt2) of the thickness-extensional mode
+    along x3 of a numeric PiezoMaterial (rotate it first for a tilted
+    c-axis, only the x3 components are kept), c33D stiffened by the
+    piezoelectric effect, kt2 = e33^2/(c33D*eps33S)
+    """
+    cD = material.cal_cD_batch(np.array([0.0, 0.0, 1.0]))
+    c33D = cD[..., 2, 2]
+    e33 = material.piezoelec[2, 2]
+    eps33 = material.epsilon[2, 2]
+    return (material.density, c33D, e33, eps33, e33**2/(c33D*eps33))
+
+
+def _layer(material):
+    """return (rho, c33, Q) of a layer given by name or (rho, c33[, Q])"""
+    if isinstance(material, str):
+        material = LAYERS[material]
+    rho, c33, Q = (tuple(material) + (np.inf,))[:3]
+    return (rho, c33, Q)
+
+
+def layer_impedance(f, rho, c33, d, Z_load, Q=np.inf):
+    """
+    return the acoustic impedance (per unit area) seen through a layer of
+    thickness d terminated by Z_load, Q, mechanical quality factor of the
+    layer, giving the complex stiffness c33*(1 + j/Q)
+    """
+    c = c33*(1 + 1j/np.asarray(Q, dtype=float))
+    Z = np.sqrt(rho*c)
+    jtan = 1j*np.tan(2*np.pi*np.asarray(f)*np.sqrt(rho/c)*d)
+    return Z*(Z_load + Z*jtan)/(Z + Z_load*jtan)
+
+
+def stack_impedance(f, layers, Z_end=0.0):
+    """
+    return the acoustic impedance of a stack of layers seen from the film,
+    layers, [(material, thickness), ...] ordered from the film outward,
+    material, a name of LAYERS or (rho, c33[, Q]),
+    Z_end, impedance terminating the last layer, 0 for air, rho*v of the
+    substrate for a semi-infinite one
+    """
+    Z = np.asarray(Z_end, dtype=complex)
+    for material, d in reversed(list(layers)):
+        rho, c33, Q = _layer(material)
+        Z = layer_impedance(f, rho, c33, d, Z, Q)
+    return Z
+
+
+def bragg_reflector(f0, high="W", low="SiO2", pairs=4):
+    """
+    return the layers of a quarter-wave Bragg reflector at f0, pairs of
+    (high, low) acoustic impedance layers starting with the low one next
+    to the bottom electrode
+    """
+    layers = []
+    for _ in range(pairs):
+        for material in (low, high):
+            rho, c33, _ = _layer(material)
+            layers.append((material, np.sqrt(c33/rho)/(4*f0)))
+    return layers
+
+
+def fbar_impedance(f, piezo, d, area, top=(), bottom=(), Z_top=0.0,
+                   Z_bottom=0.0, Q=np.inf):
+    """
+    return the electrical input impedance (ohm) of a resonator,
+    piezo, numeric PiezoMaterial of the film, e.g. Hex6mm AlN_comsol or
+    ZnO_comsol, c-axis along x3,
+    d, film thickness, area, electrode area,
+    top, bottom, layers above and below the film, see stack_impedance,
+    Z_top, Z_bottom, impedances terminating them (air, substrate),
+    Q, mechanical quality factor of the film
+    """
+    rho, c33D, _, eps33, kt2 = thickness_constants(piezo)
+    c33D = c33D*(1 + 1j/np.asarray(Q, dtype=float))
+    kt2 = kt2*np.real(c33D)/c33D
+    Zp = np.sqrt(rho*c33D)
+    zt = stack_impedance(f, top, Z_top)/Zp
+    zb = stack_impedance(f, bottom, Z_bottom)/Zp
+    w = 2*np.pi*np.asarray(f)
+    phi = 0.5*w*np.sqrt(rho/c33D)*d
+    C0 = eps33*area/d
+
+    # refer to eq. (1) of Lakin 1993
+    ratio = ((zt + zb)*np.cos(phi)**2 + 1j*np.sin(2*phi)) / \
+        ((zt + zb)*np.cos(2*phi) + 1j*(zt*zb + 1)*np.sin(2*phi))
+    return (1 - kt2*np.tan(phi)/phi*ratio)/(1j*w*C0)
+
+
+def _peak(f, y):
+    """
+    return the frequencies of the maxima of y along the last axis, refined
+    by a parabola through the three samples around each maximum, nan where
+    the maximum lies on the first or last sample or the vertex of the
+    parabola falls outside them
+    """
+    n = y.shape[-1]
+    k = np.argmax(y, axis=-1)
+    edge = (k == 0) | (k == n - 1)
+    k = np.clip(k, 1, n - 2)[..., None]
+    y0, y1, y2 = (np.take_along_axis(y, k + j, axis=-1)[..., 0]
+                  for j in (-1, 0, 1))
+    f = np.broadcast_to(f, y.shape)
+    f0, f1 = (np.take_along_axis(f, k + j, axis=-1)[..., 0] for j in (0, 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.nan_to_num(0.5*(y0 - y2)/(y0 - 2*y1 + y2))
+    return np.where(edge | (np.abs(shift) > 1), np.nan,
+                    f0 + shift*(f1 - f0))
+
+
+def resonances(f, Z):
+    """
+    return (fs, fp), the series and parallel resonance frequencies, the
+    minimum and the maximum of |Z| along the last axis, a frequency grid
+    around a single mode, nan when an extremum lies on the edge of the grid
+    """
+    logZ = np.log(np.abs(Z))
+    return (_peak(f, -logZ), _peak(f, logZ))
+
+
+def eval_kt2_eff(fs, fp):
+    """return the effective coupling of a resonator, IEEE Std 176 form"""
+    x = 0.5*np.pi*fs/fp
+    return x/np.tan(x)
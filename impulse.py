@@ -9,6 +9,8 @@ from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel
 from PyQt5.QtGui import QIcon, QPixmap
 from impulse_ui import Ui_MainWindow
 
+import impulse_model
+
 
 class MyMainWindow(QMainWindow, Ui_MainWindow):
     def __init__(self):
@@ -39,19 +41,18 @@ class MyMainWindow(QMainWindow, Ui_MainWindow):
     
     # calculate the lambda
     def cal_lambda(self):
-        self.lambda0 = np.round(self.v/self.freq, 1)
+        self.lambda0 = np.round(impulse_model.cal_lambda(self.v, self.freq), 1)
         self.lineEdit_lambda.setText(str(self.lambda0))
     
     # calculate the number of finger pairs
     def cal_Np(self):
-        self.Np = int(2*self.freq/self.nbw)
+        self.Np = int(impulse_model.cal_Np(self.freq, self.nbw))
         self.lineEdit_Np.setText(str(self.Np))
     
     # calculate the aperture
     def cal_aperture(self):
-        temp_a = (1/self.res)*(1/(2*self.freq*1e-4*self.Co*self.Np))*(4*self.K2*self.Np)
-        temp_b = ((4*self.K2*self.Np)**2 + np.pi**2)
-        self.aperture = np.round(temp_a/temp_b*1e6, 1)
+        self.aperture = np.round(impulse_model.cal_aperture(
+            self.freq, self.Np, self.K2, self.Co, self.res), 1)
         self.lineEdit_aperture.setText(str(self.aperture))
 
     # design
@@ -67,7 +68,8 @@ class MyMainWindow(QMainWindow, Ui_MainWindow):
         self.cal_aperture()
         
 
-app = QApplication(sys.argv)
-window = MyMainWindow()
-window.show()
-sys.exit(app.exec())
\ No newline at end of file
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = MyMainWindow()
+    window.show()
+    sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+Impulse model design of SAW delay lines, the equations behind 'impulse.py'
+without the GUI. The functions take numbers or numpy arrays, which are
+broadcast against each other, so the design table of a whole product family
+comes out of one call of design_table.
+
+The frequency response of a delay line follows from the impulse response of
+its IDTs, sampled from the finger positions, polarities and overlaps
+(apodization) and transformed by FFT, see delay_line_response.
+
+Units: frequency and bandwidth in MHz, velocity in m/s, K2 as a fraction
+(not %), Co in pF/cm per finger pair, source resistance in ohm, wavelength
+and aperture in um.
+
+References:
+[1] C.S. Hartmann, D.T. Bell, R.C. Rosenfeld, Impulse model design of
+acoustic surface-wave filters, IEEE Trans. Microw. Theory Tech. 21(4) (1973)
+162-175.
+[2] W.C. Wilson, G.M. Atkinson, Rapid SAW sensor development tools, NASA
+Tech Reports (2007) 1-7.
+======================================================================
+"""
+
+import numpy as np
+
+from materials import default_registry
+
+
+def cal_lambda(v, freq):
+    """return the wavelength, um"""
+    return np.asarray(v, dtype=float)/freq
+
+
+def cal_Np(freq, nbw):
+    """
+    return the number of finger pairs,
+    nbw, null bandwidth of the uniform IDT, MHz
+    """
+    return np.floor(2*np.asarray(freq, dtype=float)/nbw).astype(int)
+
+
+def cal_aperture(freq, Np, K2, Co, res):
+    """return the aperture matching the source resistance res, um"""
+    temp_a = (1/res)*(1/(2*freq*1e-4*Co*Np))*(4*K2*Np)
+    temp_b = (4*K2*Np)**2 + np.pi**2
+    return temp_a/temp_b*1e6
+
+
+def design(freq, nbw, res, v, K2, Co):
+    """
+    design the IDT, return (lambda0, Np, aperture)
+    """
+    Np = cal_Np(freq, nbw)
+    return (cal_lambda(v, freq), Np, cal_aperture(freq, Np, K2, Co, res))
+
+
+def substrate_constants(substrate, registry=None):
+    """
+    return (v, K2, Co) arrays of the substrate names (array-like) of
+    impulse_materials.json, K2 as a fraction
+    """
+    registry = registry or default_registry()
+    names = np.asarray(substrate)
+    unique, inverse = np.unique(names, return_inverse=True)
+    table = np.array([[registry.substrate(name)[key]
+                       for key in ("velocity", "K2", "Co")]
+                      for name in unique.tolist()]).reshape(-1, 3)
+    values = table[inverse.reshape(names.shape)]
+    return (values[..., 0], values[..., 1], values[..., 2])
+
+
+def design_table(freq, fbw, res, substrate, registry=None):
+    """
+    design the IDTs of broadcastable arrays of specifications,
+    freq, center frequency, MHz,
+    fbw, fractional null bandwidth (null bandwidth/freq),
+    res, source resistance, ohm,
+    substrate, names of impulse_materials.json
+    return a dict of arrays of the broadcast shape, with the specifications
+    and "lambda" (um), "Np" and "aperture" (um)
+    """
+    v, K2, Co = substrate_constants(substrate, registry)
+    freq, fbw, res, substrate, v, K2, Co = np.broadcast_arrays(
+        np.asarray(freq, dtype=float), np.asarray(fbw, dtype=float),
+        np.asarray(res, dtype=float), np.asarray(substrate), v, K2, Co)
+    # 2*freq/(fbw*freq) could round below an integer, use 2/fbw directly
+    Np = cal_Np(1.0, fbw)
+    return {"freq": freq, "fbw": fbw, "res": res, "substrate": substrate,
+            "lambda": cal_lambda(v, freq), "Np": Np,
+            "aperture": cal_aperture(freq, Np, K2, Co, res)}
+
+
+def idt_fingers(Np, wavelength, apodization=None):
+    """
+    return (positions, polarity, overlap) of a single-electrode IDT with Np
+    finger pairs, positions of the 2*Np fingers in um, polarity +1/-1 and
+    the normalized overlap of each pair of neighbouring fingers (2*Np - 1),
+    apodization, None for a uniform IDT, an array of overlaps, or a function
+    of the position along the IDT scaled to [0, 1]
+    """
+    n = 2*Np
+    positions = np.arange(n)*wavelength/2
+    polarity = np.where(np.arange(n) % 2 == 0, 1.0, -1.0)
+    if apodization is None:
+        overlap = np.ones(n - 1)
+    elif callable(apodization):
+        overlap = apodization((np.arange(n - 1) + 0.5)/(n - 1))
+    else:
+        overlap = apodization
+    return (positions, polarity,
+            np.broadcast_to(np.asarray(overlap, dtype=float), (n - 1,)))
+
+
+def idt_sources(positions, polarity, overlap):
+    """
+    return (x, s), the positions (um) and strengths of the impulse-model
+    sources, one at each gap between neighbouring fingers, weighted by
+    their overlap and zero between fingers of the same polarity
+    """
+    positions = np.asarray(positions, dtype=float)
+    polarity = np.asarray(polarity, dtype=float)
+    x = 0.5*(positions[1:] + positions[:-1])
+    s = 0.5*(polarity[1:] - polarity[:-1])*overlap
+    return (x, s)
+
+
+def impulse_response(positions, polarity, overlap, v, dt):
+    """
+    return (t0, h), the impulse response of an IDT sampled every dt (us)
+    from t0 (us), v in m/s
+    """
+    x, s = idt_sources(positions, polarity, overlap)
+    t = x/v
+    t0 = t.min()
+    k = np.rint((t - t0)/dt).astype(int)
+    h = np.zeros(k.max() + 1)
+    np.add.at(h, k, s)
+    return (t0, h)
+
+
+def transfer_function(t0, h, dt, nfft):
+    """
+    return (f, H, tau), the transfer function of a sampled impulse response
+    at f = k/(nfft*dt) (MHz), k = 0..nfft/2, by FFT and its group delay
+    tau (us), taken analytically from the FFT of t*h(t)
+    """
+    t = np.arange(h.size)*dt
+    f = np.fft.rfftfreq(nfft, dt)
+    H = np.fft.rfft(h, nfft)
+    Ht = np.fft.rfft(t*h, nfft)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tau = t0 + (Ht/H).real
+    return (f, H*np.exp(-2j*np.pi*f*t0), tau)
+
+
+def idt_loss(f, H, K2, Co, aperture, overlap, res):
+    """
+    return the loss (dB) of a bidirectional IDT between a source (or load)
+    resistance res and the acoustic port, with the radiation conductance
+    Ga = 2*K2*f*Cs*W*|H|^2 and the static capacitance Cs*W*sum(overlap)/2,
+    the radiation susceptance is neglected
+    """
+    Cs = Co*1e-10  # pF/cm to F/m
+    W = aperture*1e-6  # um to m
+    w = 2*np.pi*f*1e6
+    Ga = 2*K2*f*1e6*Cs*W*np.abs(H)**2
+    Ct = Cs*W*np.sum(overlap)/2
+    with np.errstate(divide="ignore"):
+        return 10*np.log10(((1 + Ga*res)**2 + (w*Ct*res)**2)/(2*Ga*res))
+
+
+def delay_line_response(idt_in, idt_out, distance, v, K2=None, Co=None,
+                        aperture=None, res=50, oversample=4, df=None):
+    """
+    return the response of a SAW delay line as a dict of arrays,
+    idt_in, idt_out, (positions, polarity, overlap) of the transducers, see
+    idt_fingers, each with positions from its own origin,
+    distance, distance between the origins of the two IDTs, um, the total
+    delay of a source pair is (distance + x_out - x_in)/v,
+    v, SAW velocity, m/s,
+    K2, Co, aperture, res, substrate and circuit data for the insertion
+    loss, see idt_loss, skipped if not given,
+    oversample, time samples per smallest spacing of sources,
+    df, frequency resolution (MHz), default from the length of the IDTs
+    "f" (MHz), "H", "H_in", "H_out", "group_delay" (us) and "IL" (dB)
+    """
+    spacing = [np.diff(np.unique(idt_sources(*idt)[0])) for idt in
+               (idt_in, idt_out)]
+    dt = np.min(np.concatenate(spacing))/v/oversample
+    # the wave leaves the input IDT toward +x, so a source further along it
+    # is reached earlier, its response is the time-reversed one
+    positions, polarity, overlap = idt_in
+    responses = [impulse_response(-np.asarray(positions, dtype=float),
+                                  polarity, overlap, v, dt),
+                 impulse_response(*idt_out, v, dt)]
+    n = max(h.size for _, h in responses)
+    nfft = n if df is None else max(n, int(np.ceil(1/(df*dt))))
+    nfft = 1 << int(np.ceil(np.log2(2*nfft)))
+
+    (f, H_in, tau_in), (_, H_out, tau_out) = \
+        [transfer_function(t0, h, dt, nfft) for t0, h in responses]
+    delay = distance/v
+    out = {"f": f, "H_in": H_in, "H_out": H_out,
+           "H": H_in*H_out*np.exp(-2j*np.pi*f*delay),
+           "group_delay": tau_in + tau_out + delay}
+    if K2 is not None and Co is not None and aperture is not None:
+        out["IL"] = sum(idt_loss(f, H, K2, Co, aperture, idt[2], res)
+                        for H, idt in ((H_in, idt_in), (H_out, idt_out)))
+    return out
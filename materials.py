@@ -0,0 +1,327 @@
+"""
+Registry of material constants. It indexes the material dicts of
+'acoustics.py', 'euler_materials.json' and 'impulse_materials.json' by name,
+crystal class and source, normalizes their units on load and builds the
+crystal classes (Trig3m, Trig32, Hex6mm, Cubic, Isotropic) and numeric
+materials lazily, caching them on first access. Only the symbolic crystal
+classes need sympy. Materials with the temperature coefficients of
+'temperature_materials.json' are also built at other temperatures.
+
+Normalized units: stiffness in Pa, piezoelectric stress constants in C/m^2,
+permittivity in F/m (absolute), density in kg/m^3.
+
+    registry = default_registry()
+    registry.names(crystal_class="Trig3m")
+    LN = registry.material("LN_comsol")  # acoustics_numeric.PiezoMaterial
+    LN_85 = registry.material("LN_comsol", T=85)  # at 85 degC
+======================================================================
+"""
+
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+import acoustics
+import acoustics_numeric
+from acoustics import epsilon_0
+from acoustics_numeric import PiezoMaterial
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# arguments of the crystal classes of 'acoustics.py' and
+# 'acoustics_numeric.py', in order, i.e. their independent constants
+CRYSTAL_CLASSES = {
+    name: getattr(acoustics_numeric, name).names
+    for name in ("Trig3m", "Trig32", "Hex6mm", "Cubic", "Isotropic")
+}
+
+
+def crystal_class(constants):
+    """
+    return the name of the crystal class matching the keys of constants,
+    or None if none of CRYSTAL_CLASSES does (e.g. PVDF, mm2)
+    """
+    keys = set(constants)
+    if keys & {"c22", "c23", "c55", "ez2", "eSyy"}:
+        return None
+    if "ey2" in keys:
+        return "Trig3m"
+    if "ex1" in keys:
+        return "Trig32"
+    if "ez1" in keys:
+        return "Hex6mm"
+    if "c13" in keys or "c33" in keys:
+        return None
+    if "c12" in keys:
+        return "Cubic"
+    return "Isotropic"
+
+
+def normalize(constants, units="SI"):
+    """
+    return a copy of constants in normalized units,
+    units, "SI" for the dicts of 'acoustics.py' (density in g/m^3),
+    "GPa" for 'euler_materials.json' (stiffness in GPa, relative
+    permittivity)
+    """
+    if units not in ("SI", "GPa"):
+        raise ValueError(f"unknown units '{units}'")
+    out = {}
+    for key, value in constants.items():
+        if key == "rho" and units == "SI":
+            value = value*1e-3
+        elif key.startswith("c") and units == "GPa":
+            value = value*1e9
+        elif key.startswith("eS") and units == "GPa":
+            value = value*epsilon_0
+        out[key] = float(value)
+    # Trig. and Hex. data given with c66 instead of c12, c66 = (c11 - c12)/2
+    if "c12" not in out and "c66" in out and "c11" in out:
+        out["c12"] = out["c11"] - 2*out.pop("c66")
+    return out
+
+
+class MaterialRecord:
+    """
+    Normalized constants of one material and where they come from, with the
+    optional temperature coefficients, {key: (first order, second order)}
+    in 1/K and 1/K^2 about the reference temperature T0 (degC), keys of the
+    constants plus alpha11, alpha22, alpha33 of the thermal expansion.
+    """
+
+    def __init__(self, name, constants, source, crystal_class):
+        self.name = name
+        self.constants = constants
+        self.source = source
+        self.crystal_class = crystal_class
+        self.temperature = None
+        self.T0 = 25.0
+
+    @property
+    def density(self):
+        """density in kg/m^3, None if the source does not give it"""
+        return self.constants.get("rho")
+
+    def arguments(self):
+        """return the arguments of the crystal class, in order"""
+        if self.crystal_class is None:
+            raise ValueError(f"'{self.name}' has no supported crystal class")
+        # elastic-only data of Cubic and Isotropic materials
+        defaults = {"ex4": 0.0, "eSxx": epsilon_0}
+        return [self.constants.get(key, defaults.get(key))
+                for key in CRYSTAL_CLASSES[self.crystal_class]]
+
+    def _relative(self, key, T):
+        """return the relative change of a constant from T0 to T"""
+        a1, a2 = self.temperature.get(key, (0.0, 0.0))
+        dT = np.asarray(T, dtype=float) - self.T0
+        return a1*dT + a2*dT**2
+
+    def expansion(self, T):
+        """
+        return the diagonal thermal strains (3,) from T0 to T (degC), from
+        alpha11, alpha22 (alpha11 if not given) and alpha33
+        """
+        if self.temperature is None:
+            raise ValueError(f"'{self.name}' has no temperature coefficients")
+        keys = ("alpha11",
+                "alpha22" if "alpha22" in self.temperature else "alpha11",
+                "alpha33")
+        return np.stack([self._relative(key, T) for key in keys], axis=-1)
+
+    def at_temperature(self, T):
+        """
+        return a record of the constants at the temperature T (degC), the
+        density follows the thermal expansion unless it has its own
+        coefficients
+        """
+        if self.temperature is None:
+            raise ValueError(f"'{self.name}' has no temperature coefficients")
+        constants = {key: value*(1 + self._relative(key, T))
+                     for key, value in self.constants.items()}
+        if "rho" in constants and "rho" not in self.temperature:
+            constants["rho"] = self.constants["rho"] / \
+                np.prod(1 + self.expansion(T))
+        record = MaterialRecord(self.name, {key: float(value) for key, value
+                                            in constants.items()},
+                                self.source, self.crystal_class)
+        record.T0 = float(T)
+        return record
+
+
+class MaterialRegistry:
+    """
+    Materials indexed by name, crystal class and source, with the crystal
+    objects and numeric materials built lazily and cached.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.substrates = {}
+        self._crystals = {}
+        self._materials = {}
+
+    def register(self, name, constants, source="user", units="SI",
+                 crystal_class_name=None):
+        """
+        add a material, the crystal class is detected from the keys of
+        constants unless crystal_class_name is given, return its record
+        """
+        if name in self.records:
+            raise ValueError(f"material '{name}' is already registered")
+        constants = normalize(constants, units)
+        if crystal_class_name is None:
+            crystal_class_name = crystal_class(constants)
+        elif crystal_class_name not in CRYSTAL_CLASSES:
+            raise ValueError(f"unknown crystal class '{crystal_class_name}'")
+        record = MaterialRecord(name, constants, source, crystal_class_name)
+        self.records[name] = record
+        return record
+
+    def register_substrate(self, name, velocity, K2, Co, source="user"):
+        """
+        add a SAW substrate of the impulse model design,
+        velocity in m/s, K2 in %, Co in pF/cm per finger pair
+        """
+        self.substrates[name] = {"velocity": float(velocity),
+                                 "K2": float(K2)*0.01,
+                                 "Co": float(Co),
+                                 "source": source}
+
+    def load_module(self, module=acoustics):
+        """register the material dicts defined in a module"""
+        for name, value in vars(module).items():
+            if isinstance(value, dict) and "c11" in value:
+                self.register(name, value, source=module.__name__)
+
+    def load_json(self, path, units="GPa"):
+        """register the materials of a json file like euler_materials.json"""
+        with open(path) as f_obj:
+            data = json.load(f_obj)
+        for name, constants in data.items():
+            self.register(name, constants, source=os.path.basename(path),
+                          units=units)
+
+    def register_temperature(self, name, coefficients, T0=25.0):
+        """
+        add the temperature coefficients {key: (first order, second order)}
+        of a registered material, about the reference temperature T0 (degC),
+        keys of its constants, c66 for c12, or alpha11, alpha22, alpha33
+        """
+        record = self.records[name]
+        coefficients = dict(coefficients)
+        # coefficients of c66 given for records with c12, as in normalize,
+        # c12 = c11 - 2*c66 holds at any temperature, order by order
+        if "c66" in coefficients and "c66" not in record.constants:
+            c11, c12 = record.constants["c11"], record.constants["c12"]
+            T66 = coefficients.pop("c66")
+            T11 = coefficients.get("c11", (0.0, 0.0))
+            coefficients["c12"] = tuple(
+                (c11*a11 - (c11 - c12)*a66)/c12 for a11, a66 in zip(T11, T66))
+        unknown = set(coefficients) - set(record.constants) - \
+            {"alpha11", "alpha22", "alpha33"}
+        if unknown:
+            raise ValueError(f"unknown temperature coefficients "
+                             f"{sorted(unknown)} of '{name}'")
+        record.temperature = {key: tuple(float(x) for x in value)
+                              for key, value in coefficients.items()}
+        record.T0 = float(T0)
+
+    def load_temperature(self, path, unverified=False):
+        """
+        register the temperature coefficients of a json file like
+        temperature_materials.json, skipping the materials not registered,
+        unverified, also register the sets marked "verified": false, known
+        not to reproduce measured TCFs
+        """
+        with open(path) as f_obj:
+            data = json.load(f_obj)
+        for entry in data.values():
+            entry = dict(entry)
+            names = entry.pop("materials")
+            T0 = entry.pop("T0", 25.0)
+            if not entry.pop("verified", True) and not unverified:
+                continue
+            for name in names:
+                if name in self.records:
+                    self.register_temperature(name, entry, T0)
+
+    def load_substrates(self, path):
+        """
+        register the substrates of a json file like impulse_materials.json
+        """
+        with open(path) as f_obj:
+            data = json.load(f_obj)
+        for name, entry in data.items():
+            self.register_substrate(name, entry["velocity"], entry["K2"],
+                                    entry["Co"],
+                                    source=os.path.basename(path))
+
+    def names(self, crystal_class=None, source=None):
+        """return the names of materials, optionally filtered"""
+        return [name for name, record in self.records.items()
+                if crystal_class in (None, record.crystal_class)
+                and source in (None, record.source)]
+
+    def record(self, name):
+        """return the record of a material"""
+        return self.records[name]
+
+    def crystal(self, name, symbolic=False):
+        """
+        return the crystal class object of a material, from
+        'acoustics_numeric.py', or from 'acoustics.py' if symbolic
+        """
+        if (name, symbolic) not in self._crystals:
+            self._crystals[name, symbolic] = _build_crystal(
+                self.records[name], symbolic)
+        return self._crystals[name, symbolic]
+
+    def material(self, name, T=None):
+        """
+        return the numeric PiezoMaterial of a material, a shared object,
+        rotate a copy of it (e.g. saw.rotated),
+        T, temperature (degC), default the temperature of the data, needs
+        the temperature coefficients of the material
+        """
+        key = (name, None if T is None else float(T))
+        if key not in self._materials:
+            record = self.records[name]
+            if T is None:
+                crystal = self.crystal(name)
+            else:
+                record = record.at_temperature(T)
+                crystal = _build_crystal(record)
+            self._materials[key] = PiezoMaterial.from_crystal(
+                record.density, crystal)
+        return self._materials[key]
+
+    def substrate(self, name):
+        """return the impulse model data of a SAW substrate"""
+        return self.substrates[name]
+
+
+def _build_crystal(record, symbolic=False):
+    """
+    return the crystal class object of a record, from 'acoustics_numeric.py',
+    or from 'acoustics.py' if symbolic
+    """
+    module = acoustics if symbolic else acoustics_numeric
+    return getattr(module, record.crystal_class)(*record.arguments())
+
+
+@lru_cache(maxsize=None)
+def default_registry():
+    """
+    return the registry of the materials shipped with the package, loaded
+    once per process
+    """
+    registry = MaterialRegistry()
+    registry.load_module(acoustics)
+    registry.load_json(os.path.join(_HERE, "euler_materials.json"))
+    registry.load_substrates(os.path.join(_HERE, "impulse_materials.json"))
+    registry.load_temperature(
+        os.path.join(_HERE, "temperature_materials.json"))
+    return registry
@@ -0,0 +1,124 @@
+"""
+This is a regression testbench for the numeric solvers, 'saw.py',
+'sweep.py', 'com.py' and 'fbar.py', against known values and against each other. Each check
+prints the computed value and its reference, and the script exits with the
+number of failed checks, e.g. python numeric_testbench.py
+"""
+
+import sys
+
+import numpy as np
+
+import com
+import fbar
+import impulse_model
+from materials import default_registry
+from saw import rotated, saw_velocities, saw_velocities_path
+from sweep import euler_grid, saw_sweep
+
+failures = []
+
+
+def check(name, value, reference, rtol):
+    """print a value against its reference, record it if out of rtol"""
+    value = np.asarray(value, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    error = np.max(np.abs(value - reference)/np.abs(reference))
+    ok = bool(error <= rtol)
+    print(f"{'ok  ' if ok else 'FAIL'} {name}: {np.ravel(value)[:4]} "
+          f"vs {np.ravel(reference)[:4]}, rel. error {error:.1e}")
+    if not ok:
+        failures.append(name)
+
+
+def rayleigh_velocity(vs, vl):
+    """
+    return the Rayleigh velocity of an isotropic solid, the root of
+    (2 - x)^2 = 4*sqrt(1 - x)*sqrt(1 - x*(vs/vl)^2), x = (v/vs)^2, by
+    bisection on 0 < x < 1
+    """
+    def f(x):
+        return (2 - x)**2 - 4*np.sqrt(1 - x)*np.sqrt(1 - x*(vs/vl)**2)
+
+    a, b = 0.5, 1.0 - 1e-12
+    for _ in range(100):
+        m = 0.5*(a + b)
+        a, b = (m, b) if f(a)*f(m) > 0 else (a, m)
+    return vs*np.sqrt(0.5*(a + b))
+
+
+def saw_checks(registry):
+    # === YZ-LiNbO3, Euler angles (0, 90, 90) ===
+    print("\n=== YZ-LiNbO3 ===")
+    LN = registry.material("LN_comsol")
+    YZ = np.radians([0, 90, 90])
+    check("v_free, v_metal", saw_velocities(rotated(LN, *YZ)),
+          [3483.08, 3399.48], 1e-5)
+
+    # === Rayleigh wave of isotropic Al ===
+    print("\n=== isotropic Al ===")
+    Al = registry.material("Al_auld_poly")
+    vs = np.sqrt(Al.stiffness[3, 3]/Al.density)
+    vl = np.sqrt(Al.stiffness[0, 0]/Al.density)
+    check("v_free, v_metal", saw_velocities(Al),
+          [rayleigh_velocity(vs, vl)]*2, 1e-6)
+
+    # === continuation along a beta sweep of Y-rotated LiNbO3 ===
+    print("\n=== continuation, beta sweep ===")
+    beta = np.radians(np.linspace(0, 180, 37))
+    angles = euler_grid(0, beta, 0).reshape(-1, 3)
+    check("saw_velocities_path", saw_velocities_path(LN, angles),
+          np.transpose([saw_velocities(rotated(LN, *x)) for x in angles]),
+          1e-6)
+
+    # === sweep.saw_sweep with and without continuation ===
+    print("\n=== saw_sweep, continuation ===")
+    angles = euler_grid(0, np.radians(np.arange(20, 60, 10)),
+                        np.radians(np.arange(0, 30, 10)))
+    plain = saw_sweep(LN, angles, processes=2)
+    continued = saw_sweep(LN, angles, processes=2, continuation=True)
+    check("v_free", continued[0], plain[0], 1e-6)
+    check("v_metal", continued[1], plain[1], 1e-6)
+
+
+def com_checks():
+    # === conductance of a uniform IDT at f0, COM against impulse model ===
+    print("\n=== COM IDT conductance at f0 ===")
+    v, K2, Co, aperture = 3488.0, 0.045, 4.6, 1000.0
+    wavelength = v/100.0
+    f0 = v/wavelength
+    for Np in (20, 50):
+        G = com.admittance(com.idt(f0, Np, wavelength/2, v, K2, Co,
+                                   aperture))[..., 0, 0].real
+        # impulse model, |H(f0)| = 2*Np - 1 sources, against 2*Np of the
+        # COM model, which has no finger ends
+        dt = wavelength/v/8
+        _, h = impulse_model.impulse_response(
+            *impulse_model.idt_fingers(Np, wavelength), v, dt)
+        f, H, _ = impulse_model.transfer_function(0.0, h, dt, 8*h.size)
+        k = np.argmin(np.abs(f - f0))
+        Ga = 2*K2*f[k]*1e6*Co*1e-10*aperture*1e-6*np.abs(H[k])**2
+        check(f"G, Np = {Np}", G*(1 - 0.5/Np)**2, Ga, 1e-9)
+
+
+def fbar_checks(registry):
+    # === free AlN plate, no electrodes, kt2_eff = kt2 ===
+    print("\n=== free AlN plate ===")
+    AlN = registry.material("AlN_comsol")
+    rho, c33D, _, _, kt2 = fbar.thickness_constants(AlN)
+    d = 1e-6
+    f0 = np.sqrt(c33D/rho)/(2*d)
+    f = np.linspace(0.9, 1.05, 20001)*f0
+    fs, fp = fbar.resonances(f, fbar.fbar_impedance(f, AlN, d, 100e-6**2))
+    check("fp", fp, f0, 1e-5)
+    check("kt2_eff", fbar.eval_kt2_eff(fs, fp), kt2, 1e-3)
+
+
+if __name__ == "__main__":
+    registry = default_registry()
+    saw_checks(registry)
+    com_checks()
+    fbar_checks(registry)
+    print(f"\n{len(failures)} failed: {failures}" if failures
+          else "\nall checks passed")
+    sys.exit(len(failures))
@@ -0,0 +1,147 @@
+"""
+Instrumentation of the solvers and sweeps: wall time per stage and counters
+(boundary-determinant evaluations, root-bracket iterations, cache hits and
+misses, worker utilization). Nothing is recorded unless a Profile is
+active, the hooks then cost one global lookup.
+
+    with Profile() as prof:
+        saw_sweep(LN, angles, processes=4)
+    print(prof.report())
+
+    # or stream the events, e.g. to a logger
+    with Profile(callback=lambda kind, name, value: print(kind, name, value)):
+        saw_velocities(cut)
+======================================================================
+"""
+
+import time
+from collections import defaultdict
+
+_active = None
+
+
+class _NullStage:
+    """stage context of an inactive profile, does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """context timing one stage of the active profile"""
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profile:
+    """
+    Wall times and counters of the instrumented code run inside its with
+    block, nested profiles shadow the outer ones.
+
+    callback, optional function called as callback(kind, name, value) for
+    every recorded event, kind "time" (s) or "count"
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counts = defaultdict(int)
+        self._outer = None
+
+    def __enter__(self):
+        global _active
+        self._outer = _active
+        _active = self
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        _active = self._outer
+        return False
+
+    def add_time(self, name, seconds, calls=1):
+        """record the wall time of a stage"""
+        self.times[name] += seconds
+        self.calls[name] += calls
+        if self.callback is not None:
+            self.callback("time", name, seconds)
+
+    def add_count(self, name, n=1):
+        """increase a counter"""
+        self.counts[name] += n
+        if self.callback is not None:
+            self.callback("count", name, n)
+
+    def as_dict(self):
+        """return the records as plain dicts, e.g. to send between processes"""
+        return {"times": dict(self.times), "calls": dict(self.calls),
+                "counts": dict(self.counts)}
+
+    def merge(self, records):
+        """add the records of another profile, see as_dict"""
+        for name, seconds in records["times"].items():
+            self.add_time(name, seconds, records["calls"].get(name, 0))
+        for name, n in records["counts"].items():
+            self.add_count(name, n)
+
+    def utilization(self):
+        """
+        return the fraction of the worker time of process-pool sweeps spent
+        in tasks, None without such sweeps
+        """
+        capacity = self.times.get("sweep.worker_capacity")
+        if not capacity:
+            return None
+        return self.times.get("sweep.worker_busy", 0.0)/capacity
+
+    def report(self):
+        """return a table of the stages (by total time) and counters"""
+        lines = [f"{'stage':32s}{'calls':>10s}{'total s':>12s}"
+                 f"{'per call ms':>14s}"]
+        for name in sorted(self.times, key=self.times.get, reverse=True):
+            calls = self.calls[name]
+            per_call = self.times[name]/calls*1e3 if calls else float("nan")
+            lines.append(f"{name:32s}{calls:10d}{self.times[name]:12.4f}"
+                         f"{per_call:14.4f}")
+        lines.append(f"{'counter':32s}{'value':>10s}")
+        for name in sorted(self.counts):
+            lines.append(f"{name:32s}{self.counts[name]:10d}")
+        if self.utilization() is not None:
+            lines.append(f"{'worker utilization':32s}"
+                         f"{self.utilization():10.1%}")
+        return "\n".join(lines)
+
+
+def active():
+    """return the active Profile, or None"""
+    return _active
+
+
+def stage(name):
+    """return a context timing the stage name in the active profile"""
+    if _active is None:
+        return _NULL_STAGE
+    return _Stage(_active, name)
+
+
+def count(name, n=1):
+    """increase the counter name of the active profile"""
+    if _active is not None:
+        _active.add_count(name, n)
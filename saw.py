@@ -0,0 +1,319 @@
+"""
+Numeric solver of surface acoustic wave (SAW) velocities with the Stroh
+formalism. The substrate occupies x3 < 0 with its surface normal along x3,
+and the SAW propagates along x1, i.e. rotate the material with Euler angles
+first (see acoustics_numeric.py).
+
+For a trial velocity the decaying partial waves are taken from the 8x8 Stroh
+eigenproblem. The surface impedance built from them is Hermitian below the
+limiting velocity, so the boundary-condition determinant is real and its
+roots are bracketed on a velocity grid and refined.
+
+References:
+[1] B.A. Auld, Acoustic fields and waves in solids, Vol. II,
+John Wiley & Sons, New York, 1973.
+[2] D.M. Barnett, J. Lothe, Dislocations and line charges in anisotropic
+piezoelectric insulators, Phys. Status Solidi B 67 (1975) 105-111.
+======================================================================
+"""
+
+import copy
+
+import numpy as np
+
+from profiling import count, stage
+
+epsilon_0 = 8.854e-12  # permittivity of free-space, F/m
+
+# abbreviated subscripts, refer to page 65 of Auld's book, Vol. I
+_VOIGT = np.array([
+    [0, 5, 4],
+    [5, 1, 3],
+    [4, 3, 2]
+])
+
+
+def _stroh_blocks(material):
+    """
+    return the generalized 4x4 matrices (Q, R, T) of the Stroh formalism,
+    (u1, u2, u3, phi) as displacement, in units scaled by the largest
+    stiffness and permittivity, plus (rho, eps0) in the same units
+    """
+    if material.density is None:
+        raise ValueError("the SAW needs the density of the material")
+    c = np.asarray(material.stiffness, dtype=float)
+    eps = np.asarray(material.epsilon, dtype=float)
+    e = np.asarray(getattr(material, "piezoelec", np.zeros((3, 6))),
+                   dtype=float)
+    c_ref = np.abs(c).max()
+    eps_ref = np.abs(eps).max()
+    c = c/c_ref
+    e = e/np.sqrt(c_ref*eps_ref)
+    eps = eps/eps_ref
+
+    def block(i, l):
+        G = np.empty((4, 4))
+        G[:3, :3] = c[_VOIGT[i, :][:, None], _VOIGT[:, l][None, :]]
+        G[:3, 3] = e[l, _VOIGT[i, :]]
+        G[3, :3] = e[i, _VOIGT[:, l]]
+        G[3, 3] = -eps[i, l]
+        return G
+
+    return (block(0, 0), block(0, 2), block(2, 2),
+            material.density/c_ref, epsilon_0/eps_ref)
+
+
+def _impedance(blocks, v):
+    """
+    return the surface impedance matrices Y (M, 4, 4) for trial velocities
+    v (M,), and a mask of the velocities below the limiting velocity
+    """
+    Q, R, T, rho, _ = blocks
+    v = np.atleast_1d(np.asarray(v, dtype=float))
+    Ti = np.linalg.inv(T)
+    N = np.empty((v.size, 8, 8))
+    N[:, :4, :4] = -Ti @ R.T
+    N[:, :4, 4:] = Ti
+    N[:, 4:, :4] = R @ Ti @ R.T - Q
+    N[:, 4:, 4:] = -R @ Ti
+    N[:, [4, 5, 6], [0, 1, 2]] += rho*v[:, None]**2
+
+    p, xi = np.linalg.eig(N)
+    # decaying partial waves into x3 < 0 have Im(p) < 0
+    order = np.argsort(p.imag, axis=1)[:, :4]
+    p = np.take_along_axis(p, order, axis=1)
+    xi = np.take_along_axis(xi, order[:, None, :], axis=2)
+    subsonic = np.all(p.imag < -1e-9, axis=1)
+
+    A = xi[:, :4, :]
+    B = xi[:, 4:, :]
+    Y = 1j*B @ np.linalg.inv(A)
+    return (0.5*(Y + np.conj(np.swapaxes(Y, -1, -2))), subsonic)
+
+
+def _boundary_det(blocks, v, electrical):
+    """
+    return the real boundary-condition determinant for trial velocities v,
+    electrical, "free" for an open surface or "metal" for a shorted one
+    """
+    count("saw.det_evaluations", np.size(v))
+    Y, subsonic = _impedance(blocks, v)
+    if electrical == "free":
+        Y[:, 3, 3] -= blocks[4]
+        det = np.linalg.det(Y).real
+    elif electrical == "metal":
+        det = np.linalg.det(Y[:, :3, :3]).real
+    else:
+        raise ValueError(f"unknown electrical boundary '{electrical}'")
+    return np.where(subsonic, det, np.nan)
+
+
+def _find_root(f, a, b, fa, fb, xtol=1e-6, maxiter=100):
+    """
+    refine a bracketed root of f in [a, b] by the Illinois variant of
+    regula falsi, falling back to bisection when it stalls
+    """
+    side = 0
+    for _ in range(maxiter):
+        count("saw.bracket_iterations")
+        x = b - fb*(b - a)/(fb - fa)
+        if not a < x < b:
+            x = 0.5*(a + b)
+        fx = f(x)
+        if fx == 0:
+            return x
+        if np.sign(fx) == np.sign(fb):
+            b, fb = x, fx
+            if side == -1:
+                fa *= 0.5
+            side = -1
+        else:
+            a, fa = x, fx
+            if side == 1:
+                fb *= 0.5
+            side = 1
+        if b - a < xtol:
+            break
+    return 0.5*(a + b)
+
+
+def limiting_velocity(material, num=721):
+    """
+    return the limiting velocity (m/s) of the sagittal plane x1-x3, the
+    lowest velocity at which a bulk partial wave stops decaying
+    """
+    theta = np.linspace(-np.pi/2, np.pi/2, num)[1:-1]
+    with stage("saw.limiting_velocity"):
+        for _ in range(3):
+            l = np.stack([np.cos(theta), np.zeros_like(theta),
+                          np.sin(theta)], axis=-1)
+            v_slow = material.cal_velocity(l)[0][:, 0]/np.cos(theta)
+            k = np.argmin(v_slow)
+            step = theta[1] - theta[0]
+            theta = np.linspace(theta[k] - step, theta[k] + step, 41)
+    return v_slow[k]
+
+
+def _solve(blocks, electrical, v, xtol):
+    """
+    bracket the roots of the boundary determinant on the velocity grid v and
+    refine the lowest one, return (velocity, slope sign) or None
+    """
+    with stage("saw.bracket"):
+        det = _boundary_det(blocks, v, electrical)
+    change = np.nonzero(np.sign(det[:-1])*np.sign(det[1:]) < 0)[0]
+    if change.size == 0:
+        count("saw.no_root")
+        return None
+    k = change[0]
+
+    def f(x):
+        return _boundary_det(blocks, x, electrical)[0]
+
+    with stage("saw.refine"):
+        return (_find_root(f, v[k], v[k + 1], det[k], det[k + 1],
+                           xtol=xtol), np.sign(det[k + 1] - det[k]))
+
+
+def _track(blocks, electrical, v_pred, step, slope, window, xtol, num=9):
+    """
+    search the root next to the predicted velocity v_pred, widening the
+    search from +-step up to +-window*v_pred, return (velocity, slope sign)
+    or None. Only roots with the same slope sign as the tracked branch are
+    accepted, since neighbouring roots of the determinant alternate in sign
+    and a change of sign means the search jumped onto another mode.
+    """
+    while step <= window*v_pred:
+        v = np.linspace(v_pred - step, v_pred + step, num)
+        with stage("saw.track"):
+            det = _boundary_det(blocks, v, electrical)
+        change = np.nonzero(np.sign(det[:-1])*np.sign(det[1:]) < 0)[0]
+        change = change[np.sign(det[change + 1] - det[change]) == slope]
+        if change.size:
+            k = change[np.argmin(np.abs(v[change] - v_pred))]
+
+            def f(x):
+                return _boundary_det(blocks, x, electrical)[0]
+
+            with stage("saw.refine"):
+                return (_find_root(f, v[k], v[k + 1], det[k], det[k + 1],
+                                   xtol=xtol), slope)
+        step *= 2
+    count("saw.track_lost")
+    return None
+
+
+def _velocity_grid(material, v_range, num):
+    """
+    return the velocity grid bracketing the roots, linear in v_range, or by
+    default from half to the limiting velocity with extra points clustered
+    toward the limit, where the roots of nearly transonic waves crowd
+    """
+    if v_range is not None:
+        return np.linspace(v_range[0], v_range[1], num)
+    v_lim = limiting_velocity(material)
+    top = 1 - np.geomspace(0.5/num, 1e-9, max(num//4, 2))
+    return v_lim*np.unique(np.concatenate([np.linspace(0.5, 1, num), top]))
+
+
+def saw_velocity(material, electrical="free", v_range=None, num=64,
+                 xtol=1e-6):
+    """
+    return the SAW velocity (m/s) of the material propagating along x1 on a
+    surface normal to x3, or nan if no root is found. Only the subsonic
+    range below the limiting velocity (the slowest bulk wave of the
+    sagittal plane, see limiting_velocity) is searched, so cuts whose
+    Rayleigh-type SAW lies above a decoupled shear-horizontal bulk wave,
+    or whose surface wave is leaky, give nan, e.g. LiNbO3 (0, beta, 90)
+    deg for beta of about 100-170 deg,
+    electrical, "free" for an open surface or "metal" for a shorted one,
+    v_range, (v_min, v_max) to search, default from half to the limiting
+    velocity,
+    num, number of grid points bracketing the root
+    """
+    blocks = _stroh_blocks(material)
+    v = _velocity_grid(material, v_range, num)
+    root = _solve(blocks, electrical, v, xtol)
+    return np.nan if root is None else root[0]
+
+
+def saw_velocities(material, v_range=None, num=64, xtol=1e-6):
+    """
+    return (v_free, v_metal), the SAW velocities (m/s) of the free and the
+    metallized surface, see saw_velocity
+    """
+    blocks = _stroh_blocks(material)
+    v = _velocity_grid(material, v_range, num)
+    roots = [_solve(blocks, electrical, v, xtol)
+             for electrical in ("free", "metal")]
+    return tuple(np.nan if root is None else root[0] for root in roots)
+
+
+def _paths(material, angles, electricals, num, xtol, window):
+    """
+    return the SAW velocities (len(electricals), M) along a path of cuts,
+    each electrical boundary tracked on its own branch, the rotation, the
+    Stroh blocks and the fallback velocity grid shared per cut
+    """
+    angles = np.asarray(angles, dtype=float).reshape(-1, 3)
+    v_path = np.full((len(electricals), len(angles)), np.nan)
+    slopes = [None]*len(electricals)
+    for n, angle in enumerate(angles):
+        cut = rotated(material, *angle)
+        blocks = _stroh_blocks(cut)
+        v = None
+        for j, electrical in enumerate(electricals):
+            root = None
+            if slopes[j] is not None:
+                if n >= 2 and not np.isnan(v_path[j, n - 2]):
+                    dv = v_path[j, n - 1] - v_path[j, n - 2]
+                else:
+                    dv = 0.0
+                v_pred = v_path[j, n - 1] + dv
+                step = max(2*abs(dv), 1e-4*v_pred)
+                root = _track(blocks, electrical, v_pred, step, slopes[j],
+                              window, xtol)
+            if root is None:
+                if v is None:
+                    v = _velocity_grid(cut, None, num)
+                root = _solve(blocks, electrical, v, xtol)
+            if root is None:
+                slopes[j] = None
+                continue
+            v_path[j, n], slopes[j] = root
+    return v_path
+
+
+def saw_velocity_path(material, angles, electrical="free", num=64,
+                      xtol=1e-6, window=0.02):
+    """
+    return the SAW velocities (m/s) along a path of neighbouring cuts,
+    continuing each root from the previous ones instead of searching the
+    whole range below the limiting velocity,
+    material, numeric material of the unrotated crystal,
+    angles, (M, 3) array of Z-X-Z euler angles in rad, ordered along the path,
+    window, largest relative change of velocity tracked between two cuts,
+    beyond it (or on a mode crossing) the full search of saw_velocity is
+    used for that cut
+    """
+    return _paths(material, angles, (electrical,), num, xtol, window)[0]
+
+
+def saw_velocities_path(material, angles, num=64, xtol=1e-6, window=0.02):
+    """
+    return (v_free, v_metal) along a path of neighbouring cuts, both
+    tracked in one pass over the cuts, see saw_velocity_path
+    """
+    v_free, v_metal = _paths(material, angles, ("free", "metal"), num, xtol,
+                             window)
+    return (v_free, v_metal)
+
+
+def rotated(material, alpha, beta, gamma):
+    """
+    return a copy of the material rotated by Z(alpha)-X(beta)-Z(gamma)
+    euler angles, in rad, the material itself is not updated
+    """
+    material = copy.copy(material)
+    material.rot_euler_update(alpha, beta, gamma)
+    return material
@@ -0,0 +1,144 @@
+"""
+Orientation sweeps of SAW properties over Euler-angle grids. The grid is cut
+into chunks that are solved in a process pool, and the results are gathered
+back in grid order, so a sweep returns the same arrays whatever the number
+of processes.
+
+On platforms that spawn the worker processes (Windows, macOS), call the
+sweeps from under an 'if __name__ == "__main__":' guard.
+======================================================================
+"""
+
+import os
+import time
+
+import numpy as np
+
+import profiling
+from acoustics import eval_kt2
+from saw import rotated, saw_velocities, saw_velocities_path
+
+
+def euler_grid(alpha, beta, gamma):
+    """
+    return the Euler-angle grid of the 1-D arrays (or scalars) alpha, beta
+    and gamma, in rad, shaped (len(alpha), len(beta), len(gamma), 3)
+    """
+    grids = np.meshgrid(np.atleast_1d(alpha), np.atleast_1d(beta),
+                        np.atleast_1d(gamma), indexing="ij")
+    return np.stack(grids, axis=-1)
+
+
+def saw_point(material, alpha, beta, gamma, cache=None):
+    """
+    return (v_free, v_metal, kt2) of the SAW on the cut rotated by
+    Z(alpha)-X(beta)-Z(gamma) euler angles, in rad,
+    cache, optional cache.TensorCache of the velocities
+    """
+    if cache is None:
+        v_free, v_metal = saw_velocities(
+            rotated(material, alpha, beta, gamma))
+    else:
+        v_free, v_metal = cache.saw_velocities(material, alpha, beta, gamma)
+    return (v_free, v_metal, eval_kt2(v_free, v_metal))
+
+
+def _saw_chunk(material, angles, cache=None):
+    """solve one chunk of (M, 3) angles, return a (M, 3) array"""
+    return np.array([saw_point(material, *angle, cache=cache)
+                     for angle in angles])
+
+
+def _saw_line(material, angles, cache=None):
+    """solve one line of (M, 3) neighbouring angles by continuation"""
+    v_free, v_metal = saw_velocities_path(material, angles)
+    return np.stack([v_free, v_metal, eval_kt2(v_free, v_metal)], axis=-1)
+
+
+def _profiled(task, material, chunk, cache=None):
+    """
+    run a task in a worker under its own profile, return (result, profile
+    records, busy time)
+    """
+    start = time.perf_counter()
+    with profiling.Profile() as prof:
+        result = task(material, chunk, cache)
+    return (result, prof.as_dict(), time.perf_counter() - start)
+
+
+def _chunks(angles, processes, chunksize):
+    """split (N, 3) angles into contiguous chunks"""
+    if chunksize is None:
+        chunksize = max(1, -(-len(angles)//(4*processes)))
+    return [angles[i:i + chunksize] for i in range(0, len(angles), chunksize)]
+
+
+def saw_sweep(material, angles, processes=None, chunksize=None,
+              continuation=False, cache=None, axis=None):
+    """
+    sweep the SAW over an orientation grid,
+    material, numeric PiezoMaterial of the unrotated crystal,
+    angles, (..., 3) array of Z-X-Z euler angles in rad, see euler_grid,
+    processes, number of worker processes, default all cores, 1 runs in
+    the calling process,
+    chunksize, number of orientations per task,
+    continuation, solve each line along a grid axis by continuing the
+    roots from cut to cut (see saw.saw_velocity_path), one line per task,
+    lines of a single cut are solved as without continuation,
+    cache, optional cache.TensorCache of the velocities, give it an on-disk
+    path to share it between the worker processes (not used by
+    continuation),
+    axis, grid axis of the continuation lines, default the longest one
+    return (v_free, v_metal, kt2) arrays shaped angles.shape[:-1]
+    """
+    angles = np.asarray(angles, dtype=float)
+    shape = angles.shape[:-1]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if continuation and shape:
+        axis = int(np.argmax(shape)) if axis is None else axis % len(shape)
+        continuation = shape[axis] > 1
+    else:
+        continuation = False
+    if continuation:
+        task = _saw_line
+        # the lines along the continuation axis, moved last
+        lines = np.moveaxis(angles, axis, -2)
+        chunks = list(lines.reshape(-1, shape[axis], 3))
+    else:
+        task = _saw_chunk
+        chunks = _chunks(angles.reshape(-1, 3), processes, chunksize)
+
+    prof = profiling.active()
+    start = time.perf_counter()
+    if processes == 1:
+        with profiling.stage("sweep.tasks"):
+            results = [task(material, chunk, cache) for chunk in chunks]
+    else:
+        # imported here, the process pool is not needed by serial sweeps
+        from concurrent.futures import ProcessPoolExecutor
+        n = len(chunks)
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            if prof is None:
+                results = list(executor.map(task, [material]*n, chunks,
+                                            [cache]*n))
+            else:
+                # the workers profile their tasks and send the records back
+                outputs = list(executor.map(_profiled, [task]*n,
+                                            [material]*n, chunks, [cache]*n))
+                results = [output[0] for output in outputs]
+                for _, records, busy in outputs:
+                    prof.merge(records)
+                    prof.add_time("sweep.worker_busy", busy)
+    if prof is not None:
+        wall = time.perf_counter() - start
+        prof.add_time("sweep", wall)
+        prof.add_count("sweep.tasks", len(chunks))
+        prof.add_count("sweep.orientations", int(np.prod(shape)))
+        if processes > 1 and wall > 0:
+            prof.add_time("sweep.worker_capacity", wall*processes)
+
+    out = np.concatenate(results) if results else np.empty((0, 3))
+    if continuation:
+        out = np.moveaxis(out.reshape(lines.shape), -2, axis)
+    return tuple(out[..., k].reshape(shape) for k in range(3))
@@ -0,0 +1,175 @@
+"""
+Temperature behaviour of SAW cuts: the velocity is solved at a few
+temperatures per orientation with the material constants of
+'temperature_materials.json' (see materials.MaterialRecord.at_temperature),
+and the frequency of a fixed transducer, f = v/lambda with lambda growing
+with the thermal expansion along the propagation direction, is fitted by a
+quadratic in T - T0 for all orientations at once.
+
+    angles = euler_grid(0, np.radians(np.arange(0, 181)), 0)
+    out = tcf_map("Quartz_LH_1949", angles)
+    out["TCF"]*1e6, out["turnover"]  # ppm/K, degC
+
+The coefficients are relative, (1/X) dX/dT, so one quartz set serves the
+records of both sign conventions: the IEEE 1978 records (c14 > 0) are the
+axes of the 1949 ones turned by 180 deg about z, which reverses c14 and ex1
+but not their relative changes. The cut angles do move, see st_x_angles,
+and 'python temperature.py' checks that ST-X turns over near room
+temperature for every quartz record with coefficients.
+
+The LiNbO3 set (Smith 1971) is marked unverified and not registered by
+default: it gives 128YX (0, 38, 0) at -45 ppm/K against about -75
+measured, and YZ at -85 against about -94. The first-order TCF at T0
+depends on the first-order coefficients only, so the gap lies in the
+coefficient set itself; at 128YX it hinges on the coefficients of e15
+(ex5) and eps11 (eSxx). Register it explicitly to study it anyway,
+
+    registry = default_registry()
+    registry.load_temperature("temperature_materials.json", unverified=True)
+
+References:
+[1] R. Bechmann, A.D. Ballato, T.J. Lukaszek, Higher-order temperature
+coefficients of the elastic stiffnesses and compliances of alpha-quartz,
+Proc. IRE 50(8) (1962) 1812-1822.
+[2] R.T. Smith, F.S. Welsh, Temperature dependence of the elastic,
+piezoelectric, and dielectric constants of lithium tantalate and lithium
+niobate, J. Appl. Phys. 42(6) (1971) 2219-2230.
+======================================================================
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from materials import default_registry
+from sweep import saw_sweep
+
+
+def propagation_strain(material, record, angles, T):
+    """
+    return the thermal strain from T0 to T (degC) of a record along the
+    propagation direction x1 of the cuts of the numeric material rotated by
+    the Z-X-Z euler angles (..., 3), rad
+    """
+    angles = np.asarray(angles, dtype=float)
+    R, _ = material.rot_euler_RM(angles[..., 0], angles[..., 1],
+                                 angles[..., 2])
+    return np.einsum('...i,i,...i->...', R[..., 0, :], record.expansion(T),
+                     R[..., 0, :])
+
+
+def fit_temperature(T, y, T0):
+    """
+    fit y (K, ...) at the temperatures T (K,) by y0*(1 + a1*(T - T0) +
+    a2*(T - T0)^2) for all trailing indices at once, return (y0, a1, a2)
+    """
+    T = np.asarray(T, dtype=float) - T0
+    y = np.asarray(y, dtype=float)
+    X = np.stack([np.ones_like(T), T, T**2], axis=-1)
+    coef = np.linalg.pinv(X) @ y.reshape(len(T), -1)
+    y0, b1, b2 = (c.reshape(y.shape[1:]) for c in coef)
+    return (y0, b1/y0, b2/y0)
+
+
+def turnover_temperature(a1, a2, T0=25.0):
+    """
+    return the temperature (degC) of the extremum of 1 + a1*(T - T0) +
+    a2*(T - T0)^2, nan where a2 is 0
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(a2 != 0, T0 - a1/(2*a2), np.nan)
+
+
+def tcf_map(name, angles, temperatures=None, electrical="free",
+            registry=None, **kwargs):
+    """
+    evaluate the temperature coefficients of frequency of SAW cuts,
+    name, a material of the registry with temperature coefficients,
+    angles, (..., 3) Z-X-Z euler angles in rad, see sweep.euler_grid,
+    temperatures, (K,) in degC, at least 3, default T0 - 30, T0, T0 + 30,
+    electrical, "free" or "metal" surface,
+    kwargs, passed to sweep.saw_sweep (processes, continuation, ...)
+    return a dict of arrays shaped angles.shape[:-1], "v" (m/s) and "f"
+    (relative frequency) with a leading temperature axis, and "TCF" (1/K),
+    "TCF2" (1/K^2), "TCD" (1/K), "turnover" (degC), plus "T" and "T0"
+    """
+    registry = registry or default_registry()
+    record = registry.record(name)
+    if record.temperature is None:
+        raise ValueError(f"'{name}' has no temperature coefficients")
+    T0 = record.T0
+    if temperatures is None:
+        temperatures = T0 + np.array([-30.0, 0.0, 30.0])
+    temperatures = np.asarray(temperatures, dtype=float)
+    if temperatures.size < 3:
+        raise ValueError("at least 3 temperatures are needed")
+    index = ("free", "metal").index(electrical)
+
+    v = np.stack([saw_sweep(registry.material(name, T), angles,
+                            **kwargs)[index]
+                  for T in temperatures])
+    material = registry.material(name)
+    f = v/(1 + np.stack([propagation_strain(material, record, angles, T)
+                         for T in temperatures]))
+    _, tcf, tcf2 = fit_temperature(temperatures, f, T0)
+    return {"T": temperatures, "T0": T0, "v": v, "f": f, "TCF": tcf,
+            "TCF2": tcf2, "TCD": -tcf,
+            "turnover": turnover_temperature(tcf, tcf2, T0)}
+
+
+def st_x_angles(record):
+    """
+    return the Z-X-Z euler angles (3,), rad, of ST-X quartz in the axes of a
+    quartz record, (0, 132.75, 0) deg in the IEEE 1949 convention (c14 < 0)
+    and (180, 132.75, 0) deg in the 1978 one (c14 > 0)
+    """
+    alpha = 0.0 if record.constants["c14"] < 0 else 180.0
+    return np.radians([alpha, 132.75, 0.0])
+
+
+def st_x_turnover(registry=None, **kwargs):
+    """
+    evaluate ST-X on every quartz (Trig32) record with temperature
+    coefficients, kwargs passed to tcf_map,
+    return {name: (TCF (1/K), turnover (degC))}
+    """
+    registry = registry or default_registry()
+    out = {}
+    for name in registry.names(crystal_class="Trig32"):
+        record = registry.record(name)
+        if record.temperature is None:
+            continue
+        result = tcf_map(name, st_x_angles(record), registry=registry,
+                         **kwargs)
+        out[name] = (float(result["TCF"]), float(result["turnover"]))
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="check that ST-X quartz turns over near room "
+                    "temperature for every quartz record")
+    parser.add_argument("--window", type=float, nargs=2, default=(0, 50),
+                        metavar=("LOW", "HIGH"),
+                        help="accepted turnover temperatures, degC")
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    low, high = args.window
+    failed = 0
+    print(f"{'material':24s}{'TCF ppm/K':>12s}{'turnover degC':>16s}")
+    for name, (tcf, turnover) in st_x_turnover(
+            processes=args.processes).items():
+        ok = low <= turnover <= high
+        failed += not ok
+        print(f"{name:24s}{tcf*1e6:12.3f}{turnover:16.1f}"
+              f"{'' if ok else '  FAIL'}")
+    if failed:
+        print(f"{failed} record(s) turn over outside {low:g}..{high:g} degC")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Differential verification of the numeric engines against the symbolic one.
+The symbolic results of 'acoustics.py' (rotations, rotated constants, cD
+and Christoffel matrices of every crystal class) are derived once with
+symbols for the material constants, angles and directions, compiled with
+lambdify, and evaluated at randomized constants and angles. The batched
+outputs of 'acoustics_numeric.py' (and the compiled euler_RM kernel) must
+match them to a relative tolerance, the worst case of each function is
+reported.
+
+    python verify.py                    # 2000 cases per function
+    python verify.py -n 10000 --processes 8 --tol 1e-10
+
+The constants are drawn within +-50% of a material of each crystal class,
+the angles uniformly over a full turn and the directions over the sphere.
+======================================================================
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# reference materials of the crystal classes, the random constants are
+# drawn around them
+REFERENCE = {
+    "Trig3m": "LN_comsol",
+    "Trig32": "Quartz_auld",
+    "Hex6mm": "AlN_comsol",
+    "Cubic": "Al_auld",
+    "Isotropic": "Al_auld_poly",
+}
+
+
+def _lambdify_matrix(args, matrix):
+    """
+    compile a sympy matrix of the symbols args into a function of arrays
+    returning the stacked matrices (..., m, n)
+    """
+    from sympy import lambdify
+    f = lambdify(args, list(matrix), modules="numpy")
+    shape = matrix.shape
+
+    def evaluate(*values):
+        entries = np.broadcast_arrays(
+            *[np.asarray(x, dtype=float) for x in f(*values)],
+            *[np.asarray(v, dtype=float) for v in values])[:len(matrix)]
+        return np.stack(entries, axis=-1).reshape(entries[0].shape + shape)
+
+    return evaluate
+
+
+def _constants(crystal_class, n, rng):
+    """
+    return (names, values) of n random constant sets of a crystal class,
+    values in (n, len(names))
+    """
+    from materials import CRYSTAL_CLASSES, default_registry
+    record = default_registry().record(REFERENCE[crystal_class])
+    names = CRYSTAL_CLASSES[crystal_class]
+    reference = np.array(record.arguments(), dtype=float)
+    # elastic-only references have no piezoelectric constants
+    reference = np.where(reference == 0, 0.5, reference)
+    values = reference*rng.uniform(0.5, 1.5, size=(n, len(names)))
+    return (names, values)
+
+
+def _directions(n, rng):
+    """return n random unit directions (n, 3)"""
+    l = rng.normal(size=(n, 3))
+    return l/np.linalg.norm(l, axis=1, keepdims=True)
+
+
+def _relative_error(a, b):
+    """return the error of a against b per case, relative to max |b|"""
+    axes = tuple(range(1, b.ndim))
+    scale = np.max(np.abs(b), axis=axes)
+    return np.max(np.abs(a - b), axis=axes)/np.where(scale > 0, scale, 1.0)
+
+
+def check_rot_euler_RM(n, rng):
+    """symbolic rot_euler_RM against numeric rot_euler_RM and euler_RM"""
+    from sympy import symbols
+    import acoustics
+    import acoustics_numeric
+    alpha, beta, gamma = symbols("alpha beta gamma")
+    R, M = acoustics.ElasticMaterial(1, 1, 1).rot_euler_RM(alpha, beta, gamma)
+    f_R = _lambdify_matrix((alpha, beta, gamma), R)
+    f_M = _lambdify_matrix((alpha, beta, gamma), M)
+
+    angles = rng.uniform(-np.pi, np.pi, size=(3, n))
+    R0, M0 = f_R(*angles), f_M(*angles)
+    R1, M1 = acoustics_numeric.ElasticMaterial(1, 0, 0).rot_euler_RM(*angles)
+    R2, M2 = acoustics.euler_RM(*angles)
+    return {
+        "numeric rot_euler_RM": np.maximum(_relative_error(R1, R0),
+                                           _relative_error(M1, M0)),
+        "compiled euler_RM": np.maximum(_relative_error(R2, R0),
+                                        _relative_error(M2, M0)),
+    }
+
+
+def check_rot_M(n, rng):
+    """symbolic rot_M against numeric rot_M of arbitrary 3x3 matrices"""
+    from sympy import Matrix, symbols
+    import acoustics
+    import acoustics_numeric
+    r = symbols("r0:9")
+    M = acoustics.ElasticMaterial(1, 1, 1).rot_M(Matrix(3, 3, r))
+    f_M = _lambdify_matrix(r, M)
+    R = rng.uniform(-1, 1, size=(n, 3, 3))
+    M0 = f_M(*R.reshape(n, 9).T)
+    M1 = acoustics_numeric.ElasticMaterial(1, 0, 0).rot_M(R)
+    return {"numeric rot_M": _relative_error(M1, M0)}
+
+
+def check_crystal(crystal_class, n, rng):
+    """
+    symbolic rot_update, cal_cD and cal_Gamma of a crystal class against
+    the numeric rot_euler_batch, cal_cD_batch and cal_Gamma_batch
+    """
+    from sympy import Matrix, symbols, zeros
+    import acoustics
+    import acoustics_numeric
+    names, values = _constants(crystal_class, n, rng)
+    args = symbols(" ".join(names))
+    crystal = getattr(acoustics, crystal_class)(*args)
+    # the symbolic Isotropic class is elastic only
+    e = getattr(crystal, "e", zeros(3, 6))
+    material = acoustics.PiezoMaterial(1, crystal.c, crystal.eS, e)
+
+    # rotated constants
+    alpha, beta, gamma = symbols("alpha beta gamma")
+    R, M = material.rot_euler_RM(alpha, beta, gamma)
+    rotated = acoustics.PiezoMaterial(1, crystal.c, crystal.eS, e)
+    rotated.rot_update(R, M)
+    angle_args = args + (alpha, beta, gamma)
+    f_rot = [_lambdify_matrix(angle_args, m) for m in
+             (rotated.stiffness, rotated.piezoelec, rotated.epsilon)]
+
+    # cD and Christoffel matrices of the unrotated crystal
+    lx, ly, lz = symbols("lx ly lz")
+    li = Matrix([[lx, ly, lz]])
+    liK = Matrix([
+        [lx, 0, 0, 0, lz, ly],
+        [0, ly, 0, lz, 0, lx],
+        [0, 0, lz, ly, lx, 0]
+    ])
+    l_args = args + (lx, ly, lz)
+    f_cD = _lambdify_matrix(l_args, material.cal_cD(li, li.T))
+    f_Gamma = _lambdify_matrix(l_args,
+                               material.cal_Gamma(li, li.T, liK, liK.T))
+
+    angles = rng.uniform(-np.pi, np.pi, size=(n, 3))
+    l = _directions(n, rng)
+    rot_error = np.zeros(n)
+    cD_error = np.zeros(n)
+    Gamma_error = np.zeros(n)
+    # one numeric material per constant set, batched over a few cases each
+    per_material = 10
+    for start in range(0, n, per_material):
+        k = slice(start, start + per_material)
+        numeric = acoustics_numeric.PiezoMaterial.from_crystal(
+            1.0, getattr(acoustics_numeric, crystal_class)(*values[start]))
+        consts = values[start]
+        _, _, c1, eps1, e1 = numeric.rot_euler_batch(angles[k])
+        c0, e0, eps0 = (f(*consts, *angles[k].T) for f in f_rot)
+        rot_error[k] = np.max([_relative_error(c1, c0),
+                               _relative_error(e1, e0),
+                               _relative_error(eps1, eps0)], axis=0)
+        cD_error[k] = _relative_error(numeric.cal_cD_batch(l[k]),
+                                      f_cD(*consts, *l[k].T))
+        Gamma_error[k] = _relative_error(numeric.cal_Gamma_batch(l[k]),
+                                         f_Gamma(*consts, *l[k].T))
+    return {f"{crystal_class} rot_update": rot_error,
+            f"{crystal_class} cal_cD": cD_error,
+            f"{crystal_class} cal_Gamma": Gamma_error}
+
+
+def _job(name, n, seed):
+    """run one check in a worker, return {function: worst case error}"""
+    rng = np.random.default_rng(seed)
+    if name == "rot_euler_RM":
+        errors = check_rot_euler_RM(n, rng)
+    elif name == "rot_M":
+        errors = check_rot_M(n, rng)
+    else:
+        errors = check_crystal(name, n, rng)
+    return {key: (len(error), float(np.max(error)), int(np.argmax(error)))
+            for key, error in errors.items()}
+
+
+def verify(n=2000, processes=None, seed=0):
+    """
+    run all checks with n cases each in a process pool, return
+    {function: (cases, worst relative error, index of the worst case)}
+    """
+    jobs = ["rot_euler_RM", "rot_M"] + list(REFERENCE)
+    seeds = [seed + k for k in range(len(jobs))]
+    if processes is None:
+        processes = min(len(jobs), os.cpu_count() or 1)
+    if processes == 1:
+        results = [_job(job, n, s) for job, s in zip(jobs, seeds)]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_job, jobs, [n]*len(jobs), seeds))
+    out = {}
+    for result in results:
+        out.update(result)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=2000,
+                        help="cases per function")
+    parser.add_argument("--tol", type=float, default=1e-10,
+                        help="largest relative error accepted")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = verify(args.n, args.processes, args.seed)
+    failed = 0
+    print(f"{'function':32s}{'cases':>8s}{'worst error':>14s}")
+    for name, (cases, error, index) in results.items():
+        ok = error <= args.tol
+        failed += not ok
+        print(f"{name:32s}{cases:8d}{error:14.3e}"
+              f"{'' if ok else f'  FAIL (case {index})'}")
+    if failed:
+        print(f"{failed} function(s) beyond the tolerance {args.tol:g}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())